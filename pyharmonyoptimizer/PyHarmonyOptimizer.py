@@ -1,154 +1,1879 @@
 #PyHarmonyOptimizer.py
-import random
+import heapq
+import json
+import math
+import os
+import tempfile
+import threading
+import time
 import types
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, OrderedDict
+from collections.abc import Mapping
 from abc import ABC, abstractmethod
 
+import numpy as np
+
+
+# Used when a sampler is called without an optimizer's generator
+_default_rng = np.random.default_rng()
+
 
 class Sampler(ABC):
 
+    __slots__ = ()
+
+    # {'min_val': var, 'max_val': var}: bounds taken from the value of an
+    # earlier variable of the same harmony
+    dependencies = {}
+
+    # sample() draws one value; sample(n) draws n values in one call
     @abstractmethod
-    def sample(self):
+    def sample(self, n=None, rng=None):
         pass
 
+    # n codes drawn in one call; the built-in samplers draw codes directly
+    def sample_codes(self, n, rng):
+        return np.array([self.encode(value) for value in self.sample(n, rng)], dtype=float)
+
+    # Pitch adjustment of codes taken from memory; unordered samplers
+    # can only draw again
+    def adjust_codes(self, codes, bw, rng):
+        return self.sample_codes(len(codes), rng)
+
+    # Harmony memory stores one float per variable; samplers translate
+    # between user values and that code.
+    def encode(self, value):
+        return value
+
+    def decode(self, code):
+        return code
+
+    # Column of codes -> numeric values for batch objectives
+    def decode_column(self, codes):
+        return codes
+
+    def bounds(self, dependency_values):
+        min_val, max_val = self.min_val, self.max_val
+        if 'min_val' in self.dependencies:
+            min_val = float(dependency_values[self.dependencies['min_val']])
+        if 'max_val' in self.dependencies:
+            max_val = float(dependency_values[self.dependencies['max_val']])
+        return min_val, max_val
+
 
 class Continuous(Sampler):
 
-    def __init__(self, *args):
+    __slots__ = ('min_val', 'max_val', 'dependencies')
+
+    def __init__(self, *args, dependencies=None):
         min_val, max_val = args
         self.min_val = min_val
         self.max_val = max_val
-    def sample(self):
-        return random.uniform(self.min_val, self.max_val)
+        self.dependencies = dependencies or {}
+    def sample(self, n=None, rng=None):
+        return (rng or _default_rng).uniform(self.min_val, self.max_val, n)
+
+    def sample_codes(self, n, rng):
+        return rng.uniform(self.min_val, self.max_val, n)
+
+    # Moves by at most bw times the width of the range
+    def adjust_codes(self, codes, bw, rng):
+        step = bw * (self.max_val - self.min_val)
+        return np.clip(codes + rng.uniform(-step, step, len(codes)), self.min_val, self.max_val)
+
+    # Inclusive range of codes whose values lie within [min_val, max_val]
+    def code_range(self, min_val, max_val):
+        return min_val, max_val
+
+    def sample_code_between(self, min_val, max_val, rng):
+        if min_val > max_val:
+            min_val, max_val = self.min_val, self.max_val
+        return rng.uniform(min_val, max_val)
+
+    def encode(self, value):
+        return float(value)
+
+    def decode(self, code):
+        return float(code)
 
 
 class Discrete(Sampler):
 
-    def __init__(self, values):
-        self.values = values
+    __slots__ = ('values', 'min_val', 'max_val', 'dependencies', '_codes', '_table')
+
+    def __init__(self, values, dependencies=None):
+        # Sorted, so that codes follow the order of the values and a value
+        # range maps to a contiguous code range
+        try:
+            self.values = sorted(values)
+        except TypeError:
+            self.values = list(values)
+        self.min_val = self.values[0]
+        self.max_val = self.values[-1]
+        self.dependencies = dependencies or {}
+        self._codes = {value: index for index, value in enumerate(self.values)}
+        self._table = np.asarray(self.values)
+
+    def sample(self, n=None, rng=None):
+        indices = (rng or _default_rng).integers(len(self.values), size=n)
+        if n is None:
+            return self.values[indices]
+        return self._table[indices]
+
+    def sample_codes(self, n, rng):
+        return rng.integers(len(self.values), size=n).astype(float)
+
+    # Moves to a neighbouring value
+    def adjust_codes(self, codes, bw, rng):
+        steps = 2.0 * rng.integers(2, size=len(codes)) - 1
+        return np.clip(codes + steps, 0, len(self.values) - 1)
+
+    def code_range(self, min_val, max_val):
+        return bisect_left(self.values, min_val), bisect_right(self.values, max_val) - 1
+
+    def sample_code_between(self, min_val, max_val, rng):
+        low, high = self.code_range(min_val, max_val)
+        if low > high:
+            low, high = 0, len(self.values) - 1
+        return float(rng.integers(low, high + 1))
+
+    def encode(self, value):
+        return self._codes[value]
+
+    def decode(self, code):
+        return self.values[int(code)]
 
-    def sample(self):
-        return random.choice(self.values)
+    def decode_column(self, codes):
+        if self._table.dtype.kind in 'biuf':
+            return self._table[codes.astype(int)]
+        return codes
 
 
 class Constant(Sampler):
 
+    __slots__ = ('value',)
+
     def __init__(self, *args):
         self.value = args[0]
 
-    def sample(self):
+    def sample(self, n=None, rng=None):
+        if n is None:
+            return self.value
+        if isinstance(self.value, (int, float)):
+            return np.full(n, self.value)
+        values = np.empty(n, dtype=object)
+        values.fill(self.value)
+        return values
+
+    def sample_codes(self, n, rng):
+        return np.zeros(n)
+
+    def adjust_codes(self, codes, bw, rng):
+        return codes
+
+    def encode(self, value):
+        return 0
+
+    def decode(self, code):
         return self.value
 
+    def decode_column(self, codes):
+        if isinstance(self.value, (int, float)):
+            return np.full(len(codes), self.value, dtype=float)
+        return codes
+
 class Categorical(Sampler):
 
-    def __init__(self, categories): 
+    __slots__ = ('categories', '_codes', '_table')
+
+    def __init__(self, categories):
         self.categories = categories
+        self._codes = {category: index for index, category in enumerate(categories)}
+        self._table = np.empty(len(categories), dtype=object)
+        self._table[:] = categories
+
+    def sample(self, n=None, rng=None):
+        indices = (rng or _default_rng).integers(len(self.categories), size=n)
+        if n is None:
+            return self.categories[indices]
+        return self._table[indices]
+
+    def sample_codes(self, n, rng):
+        return rng.integers(len(self.categories), size=n).astype(float)
+
+    def encode(self, value):
+        return self._codes[value]
+
+    def decode(self, code):
+        return self.categories[int(code)]
+
+
+class DesignSpace:
+
+    # The design dict compiled into arrays, so that whole harmonies are
+    # sampled, adjusted and decoded in one call. Continuous codes lie in
+    # [lower, upper]; Discrete and Categorical codes index their value
+    # tables and Constant codes are 0. Samplers of any other type are
+    # served column by column through their own methods.
+    def __init__(self, design):
+        self.variables = list(design)
+        self.samplers = [design[var] for var in self.variables]
+        self.positions = {var: column for column, var in enumerate(self.variables)}
+        # Subclasses of the built-in samplers share their columns' treatment
+        self.continuous = np.array([isinstance(sampler, Continuous) for sampler in self.samplers], dtype=bool)
+        self.discrete = np.array([isinstance(sampler, Discrete) for sampler in self.samplers], dtype=bool)
+        self.categorical = np.array([isinstance(sampler, Categorical) for sampler in self.samplers], dtype=bool)
+        self.constant = np.array([isinstance(sampler, Constant) for sampler in self.samplers], dtype=bool)
+        self._generic = np.flatnonzero(~(self.continuous | self.discrete | self.categorical | self.constant)).tolist()
+
+        self._tables = {}
+        for column, sampler in enumerate(self.samplers):
+            if self.discrete[column]:
+                self._tables[column] = sampler.values
+            elif self.categorical[column]:
+                self._tables[column] = sampler.categories
+            elif self.constant[column]:
+                self._tables[column] = [sampler.value]
+        self._column_tables = [self._tables.get(column) for column in range(len(self.samplers))]
+        self.sizes = np.ones(len(self.samplers))
+        for column, table in self._tables.items():
+            self.sizes[column] = len(table)
+        self.lower = np.zeros(len(self.samplers))
+        self.upper = np.where(self.discrete | self.categorical, self.sizes - 1, 0.0)
+        for column in np.flatnonzero(self.continuous):
+            self.lower[column] = self.samplers[column].min_val
+            self.upper[column] = self.samplers[column].max_val
+        self.span = self.upper - self.lower
+        self._indexed = np.flatnonzero(self.discrete | self.categorical)
+        self._discrete = np.flatnonzero(self.discrete)
+        self._categorical = np.flatnonzero(self.categorical)
+
+        # Numeric tables flattened into one array for batch objectives;
+        # Categorical and non-numeric Discrete columns keep their index.
+        self._lookup = np.array([column for column, table in self._tables.items()
+                                 if not self.categorical[column] and np.asarray(table).dtype.kind in 'biuf'],
+                                dtype=int)
+        tables = [np.asarray(self._tables[column], dtype=float) for column in self._lookup]
+        self._offsets = np.cumsum([0] + [len(table) for table in tables[:-1]]).astype(int)
+        self._flat = np.concatenate(tables) if tables else np.empty(0)
+
+    def __len__(self):
+        return len(self.samplers)
+
+    def sample(self, count, rng):
+        # (count, n_vars) matrix of codes drawn uniformly over the space
+        uniform = rng.random((count, len(self.samplers)))
+        codes = self.lower + uniform * self.span
+        if len(self._indexed):
+            codes[:, self._indexed] = np.floor(uniform[:, self._indexed] * self.sizes[self._indexed])
+        for column in self._generic:
+            codes[:, column] = self.samplers[column].sample_codes(count, rng)
+        return codes
+
+    def adjust(self, codes, mask, bw, rng):
+        # Pitch adjustment of the masked codes in place: continuous codes
+        # move by at most bw times their range, Discrete codes step to a
+        # neighbouring value and Categorical codes are drawn again.
+        if not mask.any():
+            return
+        noise = rng.uniform(-1, 1, codes.shape)
+        step = bw * self.span * noise
+        if len(self._discrete):
+            step[:, self._discrete] = np.sign(noise[:, self._discrete])
+        adjusted = np.minimum(np.maximum(codes + step, self.lower), self.upper)
+        if len(self._categorical):
+            adjusted[:, self._categorical] = np.floor((noise[:, self._categorical] + 1) / 2
+                                                      * self.sizes[self._categorical])
+        for column in self._generic:
+            rows = mask[:, column]
+            if rows.any():
+                adjusted[rows, column] = self.samplers[column].adjust_codes(codes[rows, column], bw, rng)
+        np.copyto(codes, adjusted, where=mask)
+
+    def encode(self, harmony):
+        return np.array([sampler.encode(harmony[var]) for var, sampler in zip(self.variables, self.samplers)],
+                        dtype=float)
+
+    def decode(self, row):
+        values = row.tolist()
+        for column, table in self._tables.items():
+            values[column] = table[int(values[column])]
+        for column in self._generic:
+            values[column] = self.samplers[column].decode(values[column])
+        return dict(zip(self.variables, values))
+
+    def value(self, column, code):
+        table = self._column_tables[column]
+        if table is not None:
+            return table[int(code)]
+        return self.samplers[column].decode(code)
+
+    def view(self, row):
+        return HarmonyView(self, row)
+
+    def values(self, harmonies):
+        values = harmonies.astype(float)
+        if len(self._lookup):
+            values[:, self._lookup] = self._flat[self._offsets + harmonies[:, self._lookup].astype(int)]
+        for column in self._generic:
+            values[:, column] = self.samplers[column].decode_column(harmonies[:, column])
+        return values
+
+
+class HarmonyView(Mapping):
+
+    # Read-only mapping over one encoded row, handed to objectives instead
+    # of a dict: a value is decoded only when it is read. copy() or
+    # dict(view) gives a plain dict.
+    __slots__ = ('space', 'row')
+
+    def __init__(self, space, row):
+        self.space = space
+        self.row = row
+
+    def __getitem__(self, var):
+        column = self.space.positions[var]
+        return self.space.value(column, self.row[column])
+
+    def __iter__(self):
+        return iter(self.space.variables)
+
+    def __len__(self):
+        return len(self.space.variables)
+
+    def __contains__(self, var):
+        return var in self.space.positions
+
+    def copy(self):
+        return self.space.decode(self.row)
+
+    def __repr__(self):
+        return repr(self.copy())
+
+
+class Constraint:
+
+    # g(harmony) <= 0 when satisfied; a positive value is the violation and
+    # adds to the penalty. Optimization evaluates its constraints cheapest
+    # `cost` first. With vectorized=True, func takes the (K, n_vars) value
+    # matrix, like batch_objective, and returns K values.
+    __slots__ = ('func', 'cost', 'name', 'vectorized')
+
+    def __init__(self, func, cost=1.0, name=None, vectorized=False):
+        self.func = func
+        self.cost = cost
+        self.name = name if name is not None else getattr(func, '__name__', 'constraint')
+        self.vectorized = vectorized
+
+    def violation(self, space, harmonies, values=None):
+        if self.vectorized:
+            result = self.func(space.values(harmonies) if values is None else values)
+        else:
+            result = [self.func(space.view(harmony)) for harmony in harmonies]
+        return np.maximum(np.asarray(result, dtype=float), 0.0)
+
+    def __repr__(self):
+        return f"Constraint({self.name!r}, cost={self.cost})"
+
+
+class MemoryRanking:
+
+    # Feasibility-first order used by the replacement rules: feasible
+    # harmonies by fitness, then infeasible ones by penalty. Two heaps with
+    # lazy invalidation keep best and worst at O(log HMS) per replacement.
+    def __init__(self, fitness_memory, penalty_memory):
+        self.fitness_memory = fitness_memory
+        self.penalty_memory = penalty_memory
+        self.rebuild()
+
+    def key(self, index):
+        penalty = self.penalty_memory[index]
+        if penalty > 0:
+            return 1, penalty
+        return 0, self.fitness_memory[index]
+
+    def rebuild(self):
+        size = len(self.fitness_memory)
+        self.versions = [0] * size
+        self._best = []
+        self._worst = []
+        for index in range(size):
+            self._push(index)
+        heapq.heapify(self._best)
+        heapq.heapify(self._worst)
+
+    def _push(self, index, heappush=None):
+        rank, value = self.key(index)
+        version = self.versions[index]
+        best_entry = (rank, value, index, version)
+        # Ties go to the lowest index for best and the highest for worst,
+        # so the two never coincide while HMS > 1.
+        worst_entry = (-rank, -value, -index, version)
+        if heappush is None:
+            self._best.append(best_entry)
+            self._worst.append(worst_entry)
+        else:
+            heappush(self._best, best_entry)
+            heappush(self._worst, worst_entry)
+
+    def update(self, index):
+        self.versions[index] += 1
+        if len(self._best) > 2 * len(self.versions) + 16:
+            self.rebuild()
+        else:
+            self._push(index, heapq.heappush)
+
+    def best(self):
+        heap = self._best
+        while heap[0][3] != self.versions[heap[0][2]]:
+            heapq.heappop(heap)
+        return heap[0][2]
+
+    def worst(self):
+        heap = self._worst
+        while heap[0][3] != self.versions[-heap[0][2]]:
+            heapq.heappop(heap)
+        return -heap[0][2]
+
+
+def _harmony_key(harmony, continuous, tolerance):
+    if tolerance:
+        harmony = harmony.copy()
+        harmony[continuous] = np.round(harmony[continuous] / tolerance)
+    return harmony.tobytes()
+
+
+class EvaluationCache:
+
+    # Bounded map from encoded harmony to (fitness, penalty). 'lru' evicts
+    # the least recently used entry, 'fifo' the oldest one. With a
+    # tolerance, continuous values are rounded to that step before hashing.
+    def __init__(self, maxsize=10000, tolerance=None, policy='lru'):
+        if policy not in ('lru', 'fifo'):
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        self.maxsize = maxsize
+        self.tolerance = tolerance
+        self.policy = policy
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, harmony, continuous):
+        return _harmony_key(harmony, continuous, self.tolerance)
+
+    def get(self, key):
+        result = self.entries.get(key)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            if self.policy == 'lru':
+                self.entries.move_to_end(key)
+        return result
+
+    def put(self, key, result):
+        self.entries[key] = result
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries),
+                'hit_rate': self.hits / lookups if lookups else 0.0}
+
+
+class UniqueMemory:
+
+    # Hashed multiset of the memory rows. With reject=True a harmony already
+    # in memory is turned down before the objective is called. With a
+    # tolerance, continuous values are rounded to that step before hashing,
+    # so harmonies in the same grid cell count as duplicates.
+    def __init__(self, tolerance=None, reject=True):
+        self.tolerance = tolerance
+        self.reject = reject
+        self.counts = Counter()
+        self.size = 0
+        self.rejected = 0
+
+    def key(self, harmony, continuous):
+        return _harmony_key(harmony, continuous, self.tolerance)
+
+    def rebuild(self, harmonies, continuous):
+        self.counts = Counter(self.key(harmony, continuous) for harmony in harmonies)
+        self.size = len(harmonies)
+
+    def replace(self, old_key, new_key):
+        self.counts[old_key] -= 1
+        if not self.counts[old_key]:
+            del self.counts[old_key]
+        self.counts[new_key] += 1
+
+    def __contains__(self, key):
+        return key in self.counts
+
+    # Share of distinct rows in memory, 1.0 when no two rows coincide
+    def diversity(self):
+        return len(self.counts) / self.size
+
+
+class KNNSurrogate:
+
+    # Inverse-distance weighted k-nearest-neighbour estimate of (fitness,
+    # penalty), learnt from every real evaluation. Candidates it predicts
+    # to be rejected by the memory are not evaluated, except for an
+    # `explore` share kept at random so the model keeps seeing new
+    # regions. Screening starts after `warmup` observations; past
+    # `capacity` the oldest observations are overwritten.
+    def __init__(self, k=5, warmup=50, explore=0.1, capacity=10000):
+        self.k = k
+        self.warmup = warmup
+        self.explore = explore
+        self.capacity = capacity
+        self.count = 0
+        self.position = 0
+        self.screened = 0
+        self.passed = 0
+
+    def bind(self, space):
+        # Continuous and Discrete codes scaled to [0, 1]; Categorical codes
+        # one-hot, scaled so that a mismatch adds 1 to the squared distance.
+        # Binding again starts a fresh model.
+        self.space = space
+        self.count = 0
+        self.position = 0
+        self.screened = 0
+        self.passed = 0
+        self._numeric = np.flatnonzero(~space.categorical & (space.span > 0))
+        self._categorical = np.flatnonzero(space.categorical)
+        self._offsets = np.cumsum([0] + [int(space.sizes[column]) for column in self._categorical])
+        width = len(self._numeric) + int(self._offsets[-1])
+        self._features = np.empty((self.capacity, width))
+        self._norms = np.empty(self.capacity)
+        self._fitness = np.empty(self.capacity)
+        self._penalty = np.empty(self.capacity)
+
+    def features(self, harmonies):
+        space = self.space
+        features = np.zeros((len(harmonies), self._features.shape[1]))
+        numeric = len(self._numeric)
+        features[:, :numeric] = ((harmonies[:, self._numeric] - space.lower[self._numeric])
+                                 / space.span[self._numeric])
+        rows = np.arange(len(harmonies))
+        for offset, column in zip(self._offsets, self._categorical):
+            features[rows, numeric + offset + harmonies[:, column].astype(int)] = math.sqrt(0.5)
+        return features
+
+    def ready(self):
+        return self.count >= self.warmup
+
+    def observe(self, harmonies, fitness, penalty):
+        features = self.features(harmonies)
+        for start in range(0, len(features), self.capacity):
+            block = slice(start, start + self.capacity)
+            rows = (self.position + np.arange(len(features[block]))) % self.capacity
+            self._features[rows] = features[block]
+            self._norms[rows] = (features[block] ** 2).sum(axis=1)
+            self._fitness[rows] = fitness[block]
+            self._penalty[rows] = penalty[block]
+            self.position = (rows[-1] + 1) % self.capacity
+            self.count = min(self.count + len(rows), self.capacity)
+
+    def predict(self, harmonies):
+        queries = self.features(harmonies)
+        stored = self._features[:self.count]
+        distances = ((queries ** 2).sum(axis=1)[:, np.newaxis] + self._norms[:self.count]
+                     - 2 * queries @ stored.T)
+        k = min(self.k, self.count)
+        nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        distances = np.sqrt(np.maximum(np.take_along_axis(distances, nearest, axis=1), 0))
+        weights = 1 / (distances + 1e-12)
+        weights /= weights.sum(axis=1, keepdims=True)
+        return (weights * self._fitness[nearest]).sum(axis=1), (weights * self._penalty[nearest]).sum(axis=1)
+
+    # Observations and counters, saved with the optimizer's checkpoints
+    def get_state(self):
+        return {'count': self.count, 'position': self.position, 'screened': self.screened, 'passed': self.passed,
+                'features': self._features[:self.count].copy(), 'norms': self._norms[:self.count].copy(),
+                'fitness': self._fitness[:self.count].copy(), 'penalty': self._penalty[:self.count].copy()}
+
+    def set_state(self, state):
+        self.count = int(state['count'])
+        self.position = int(state['position'])
+        self.screened = int(state['screened'])
+        self.passed = int(state['passed'])
+        self._features[:self.count] = state['features']
+        self._norms[:self.count] = state['norms']
+        self._fitness[:self.count] = state['fitness']
+        self._penalty[:self.count] = state['penalty']
+
+    def stats(self):
+        screened = self.screened + self.passed
+        return {'observed': self.count, 'screened': self.screened, 'passed': self.passed,
+                'saved_rate': self.screened / screened if screened else 0.0}
+
+
+class ConvergenceLog:
+
+    # Numeric per-iteration records buffered in a preallocated array and
+    # written in bulk. The file format follows the suffix of `path`
+    # (.csv, .npz or .parquet); without a path records stay in memory.
+    # A .npz file is written once by close(), and a .parquet file is only
+    # readable after close(), which optimize() calls when it finishes.
+    # Logging another run afterwards appends to the same file.
+    DTYPE = np.dtype([('iteration', 'i8'), ('best_fit', 'f8'), ('best_penalty', 'f8'), ('accepted', '?')])
+
+    def __init__(self, path=None, every=1, capacity=4096):
+        self.path = path
+        self.every = every
+        self.format = os.path.splitext(path)[1].lower().lstrip('.') if path else None
+        if self.format not in (None, 'csv', 'npz', 'parquet'):
+            raise ValueError(f"Unsupported log format: {path}")
+        self.buffer = np.empty(capacity, dtype=self.DTYPE)
+        self.count = 0
+        self.chunks = []
+        self._next = 0
+        self._last = 0
+        self._started = False
+        self._writer = None
+        self._spill = None
+
+    def record(self, iteration, best_fit, best_penalty, accepted):
+        if iteration < self._last:  # a new run starts logging into the same file
+            self._next = 0
+        self._last = iteration
+        if iteration < self._next:
+            return
+        self._next = iteration - iteration % self.every + self.every
+        self.buffer[self.count] = (iteration, best_fit, best_penalty, accepted)
+        self.count += 1
+        if self.count == len(self.buffer):
+            self.flush()
+
+    def flush(self):
+        chunk = self.buffer[:self.count].copy()
+        self.count = 0
+        if self.format is None:
+            self.chunks.append(chunk)
+        elif self.format == 'csv':
+            with open(self.path, 'a' if self._started else 'w') as file:
+                np.savetxt(file, chunk, delimiter=',', fmt=['%d', '%.17g', '%.17g', '%d'],
+                           header='' if self._started else ','.join(self.DTYPE.names), comments='')
+        elif self.format == 'npz':
+            # Spilled to a temporary file until close() writes the archive
+            if self._spill is None:
+                self._spill = tempfile.TemporaryFile()
+            self._spill.write(chunk.tobytes())
+        elif self.format == 'parquet':
+            import pyarrow
+            import pyarrow.parquet
+            table = pyarrow.table({name: chunk[name] for name in self.DTYPE.names})
+            if self._writer is None:
+                # A closed file is carried over into the reopened one
+                previous = pyarrow.parquet.read_table(self.path) if self._started else None
+                self._writer = pyarrow.parquet.ParquetWriter(self.path, table.schema)
+                if previous is not None:
+                    self._writer.write_table(previous)
+            self._writer.write_table(table)
+        self._started = True
+
+    def close(self):
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self.format == 'npz':
+            np.savez(self.path, records=self._spilled())
+
+    def _spilled(self):
+        if self._spill is None or not self._spill.tell():
+            return np.empty(0, dtype=self.DTYPE)
+        self._spill.flush()
+        return np.memmap(self._spill, dtype=self.DTYPE, mode='r')
+
+    def records(self):
+        if self.format in ('csv', 'parquet'):
+            return read_convergence_log(self.path)
+        if self.format == 'npz':
+            return np.concatenate([self._spilled(), self.buffer[:self.count]])
+        return np.concatenate(self.chunks + [self.buffer[:self.count]])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_convergence_log(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        records = np.loadtxt(path, delimiter=',', skiprows=1, ndmin=2)
+        result = np.empty(len(records), dtype=ConvergenceLog.DTYPE)
+        for column, name in enumerate(ConvergenceLog.DTYPE.names):
+            result[name] = records[:, column]
+        return result
+    if extension == '.npz':
+        with np.load(path) as data:
+            return data['records']
+    if extension == '.parquet':
+        import pyarrow.parquet
+        table = pyarrow.parquet.read_table(path)
+        result = np.empty(table.num_rows, dtype=ConvergenceLog.DTYPE)
+        for name in ConvergenceLog.DTYPE.names:
+            result[name] = table.column(name).to_numpy()
+        return result
+    raise ValueError(f"Unsupported log format: {path}")
+
+
+class Checkpoint:
+
+    # Periodic snapshot of the optimizer state. The arrays are copied on
+    # the optimizer thread and written by a background thread to a
+    # temporary file that then replaces `path`, so a crash never leaves a
+    # half-written checkpoint. A snapshot that comes due while the
+    # previous one is still being written is skipped; check busy() before
+    # building it. The convergence trace goes to the append-only
+    # `path + '.trace'`, each snapshot adding only what is new since the
+    # last one, so a snapshot costs O(memory) however long the run is.
+    def __init__(self, path, every=100):
+        self.path = path
+        self.every = every
+        self.trace_path = path + '.trace'
+        # Trace values handed to the writer so far
+        self.traced = 0
+        self._thread = None
+
+    def busy(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def save(self, state, trace=None, block=False):
+        # `trace` continues the convergence trace from self.traced
+        if self.busy():
+            if not block:
+                return False
+            self._thread.join()
+        start = self.traced
+        if trace is not None:
+            trace = np.array(trace, dtype=float)
+            self.traced += len(trace)
+        self._thread = threading.Thread(target=self._write, args=(state, trace, start), daemon=True)
+        self._thread.start()
+        if block:
+            self._thread.join()
+        return True
+
+    def _write(self, state, trace, start):
+        if trace is not None:
+            # The trace is complete up to the snapshot's iteration before
+            # the snapshot replaces the previous one
+            if start:
+                with open(self.trace_path, 'r+b') as file:
+                    file.seek(start * trace.itemsize)
+                    file.write(trace.tobytes())
+                    file.truncate()
+                    file.flush()
+                    os.fsync(file.fileno())
+            else:
+                self._replace(self.trace_path, trace.tofile)
+        self._replace(self.path, lambda file: np.savez(file, **state))
+
+    @staticmethod
+    def _replace(path, write):
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as file:
+            write(file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+
+    def wait(self):
+        if self._thread is not None:
+            self._thread.join()
+
+
+def load_checkpoint(path):
+    with np.load(path) as data:
+        state = {name: data[name] for name in data.files}
+    if 'convergence' not in state:
+        iteration = int(state['iteration'])
+        trace = np.fromfile(path + '.trace', dtype=float, count=iteration)
+        if len(trace) < iteration:
+            raise ValueError(f"{path}.trace holds {len(trace)} of {iteration} convergence values")
+        state['convergence'] = trace
+    return state
+
+
+class EvaluationArchive:
+
+    # Append-only record of every real evaluation: a fixed-width binary
+    # file that is memory-mapped and grown `chunk` records at a time, so
+    # RAM use does not depend on its length. A JSON sidecar (path +
+    # '.json') holds the layout, the record count and the value tables of
+    # the Discrete, Categorical and Constant columns, whose codes index
+    # them; values JSON cannot hold are stored as their repr. Opening an
+    # existing archive appends a new run to it. The sidecar is rewritten
+    # whenever the file grows and before every checkpoint, so a run that
+    # dies keeps its records up to there; resuming from the checkpoint
+    # continues that run.
+    def __init__(self, path, chunk=65536):
+        self.path = path
+        self.chunk = chunk
+        self.records = None
+        self.meta = None
+        self.count = 0
+        self.run = None
+
+    @staticmethod
+    def dtype(n_vars):
+        return np.dtype([('run', 'i4'), ('evaluation', 'i8'), ('fitness', 'f8'), ('penalty', 'f8'),
+                         ('harmony', 'f8', (n_vars,))])
+
+    def bind(self, space):
+        sidecar = self.path + '.json'
+        tables = json.loads(json.dumps([None if table is None else list(table) for table in space._column_tables],
+                                       default=repr))
+        if os.path.exists(sidecar):
+            with open(sidecar) as file:
+                self.meta = json.load(file)
+            if self.meta['variables'] != space.variables:
+                raise ValueError(f"{self.path} holds evaluations of other variables: {self.meta['variables']}")
+            if self.meta.setdefault('tables', tables) != tables:
+                raise ValueError(f"{self.path} holds evaluations coded with other value tables")
+        else:
+            self.meta = {'variables': space.variables, 'n_vars': len(space), 'count': 0, 'runs': 0,
+                         'kinds': [type(sampler).__name__ for sampler in space.samplers], 'tables': tables}
+        self.count = self.meta['count']
+        self.run = self.meta['runs']
+        self.meta['runs'] += 1
+        self._map(max(-(-self.count // self.chunk), 1) * self.chunk)
+        self.flush()
+
+    def _map(self, capacity):
+        dtype = self.dtype(self.meta['n_vars'])
+        with open(self.path, 'ab') as file:
+            if file.tell() < capacity * dtype.itemsize:
+                file.truncate(capacity * dtype.itemsize)
+        if self.records is not None:
+            self.records.flush()
+        self.records = np.memmap(self.path, dtype=dtype, mode='r+', shape=(capacity,))
+
+    def append(self, harmonies, fitness, penalty, first_evaluation):
+        count = len(harmonies)
+        if self.count + count > len(self.records):
+            self._map(-(-(self.count + count) // self.chunk) * self.chunk)
+            self.flush()
+        block = self.records[self.count:self.count + count]
+        block['run'] = self.run
+        block['evaluation'] = np.arange(first_evaluation, first_evaluation + count)
+        block['fitness'] = fitness
+        block['penalty'] = penalty
+        block['harmony'] = harmonies
+        self.count += count
+
+    def flush(self):
+        self.records.flush()
+        self.meta['count'] = self.count
+        temporary = self.path + '.json.tmp'
+        with open(temporary, 'w') as file:
+            json.dump(self.meta, file, default=repr)
+        os.replace(temporary, self.path + '.json')
+
+    def resume(self, run, evaluations):
+        # Continues `run` from a checkpoint taken after `evaluations`
+        # evaluations instead of the run bind() opened. Its trailing
+        # records from past the checkpoint are dropped, the resumed run
+        # evaluates those harmonies again.
+        if self.run == self.meta['runs'] - 1:
+            self.meta['runs'] -= 1
+        self.run = run
+        records = self.records[:self.count]
+        kept = np.flatnonzero((records['run'] != run) | (records['evaluation'] < evaluations))
+        self.count = int(kept[-1]) + 1 if len(kept) else 0
+        self.flush()
+
+    def close(self):
+        if self.records is not None:
+            self.flush()
+            self.records = None
+
+    def __enter__(self):
+        return self
 
-    def sample(self):
-        return random.choice(self.categories)
+    def __exit__(self, *exc_info):
+        self.close()
 
 
+def read_history(path):
+    # (records, meta) of an EvaluationArchive; records is a read-only
+    # memory map, so columns such as records['fitness'] are not copied
+    with open(path + '.json') as file:
+        meta = json.load(file)
+    if not meta['count']:
+        return np.empty(0, dtype=EvaluationArchive.dtype(meta['n_vars'])), meta
+    records = np.memmap(path, dtype=EvaluationArchive.dtype(meta['n_vars']), mode='r', shape=(meta['count'],))
+    return records, meta
+
+
+def decode_history(records, meta):
+    # {variable: values} of archived harmonies, codes looked up in the
+    # value tables; columns without a table keep their codes
+    values = {}
+    for column, (var, table) in enumerate(zip(meta['variables'], meta['tables'])):
+        codes = records['harmony'][:, column]
+        if table is None:
+            values[var] = np.array(codes)
+        else:
+            lookup = np.empty(len(table), dtype=object)
+            lookup[:] = table
+            if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in table):
+                lookup = lookup.astype(float)
+            values[var] = lookup[codes.astype(int)]
+    return values
+
+
+class Profiler:
+
+    # Opt-in instrumentation for Minimization.optimize: cumulative time per
+    # phase, counters, and callbacks called as callback(optimizer, iteration)
+    # after every step and after every step that improves the best harmony.
+    def __init__(self, on_iteration=None, on_improvement=None):
+        self.on_iteration = on_iteration
+        self.on_improvement = on_improvement
+        self.reset()
+
+    def reset(self):
+        self.improvise_time = 0.0
+        self.evaluate_time = 0.0
+        self.update_time = 0.0
+        self.improvisations = 0
+        self.evaluations = 0
+        self.acceptances = 0
+        self.improvements = 0
+
+    def record(self, improvise_time, evaluate_time, update_time, improvisations, evaluations, acceptances):
+        self.improvise_time += improvise_time
+        self.evaluate_time += evaluate_time
+        self.update_time += update_time
+        self.improvisations += improvisations
+        self.evaluations += evaluations
+        self.acceptances += acceptances
+
+    def end_iteration(self, optimizer, iteration, improved):
+        if improved:
+            self.improvements += 1
+            if self.on_improvement is not None:
+                self.on_improvement(optimizer, iteration)
+        if self.on_iteration is not None:
+            self.on_iteration(optimizer, iteration)
+
+    def stats(self):
+        return {'improvise_time': self.improvise_time,
+                'evaluate_time': self.evaluate_time,
+                'update_time': self.update_time,
+                'improvisations': self.improvisations,
+                # Improvisations answered by the evaluation cache make up the difference
+                'evaluations': self.evaluations,
+                'acceptances': self.acceptances,
+                'rejections': self.improvisations - self.acceptances,
+                'improvements': self.improvements}
+
+
+class StoppingCriterion(ABC):
+
+    # Checked after every step of optimize; a list of criteria stops the
+    # run as soon as any of them is met.
+    def start(self, optimizer):
+        pass
+
+    @abstractmethod
+    def __call__(self, optimizer, iteration):
+        pass
+
+
+class TargetFitness(StoppingCriterion):
+
+    def __init__(self, target):
+        self.target = target
+
+    def __call__(self, optimizer, iteration):
+        return optimizer.penalty_memory[optimizer.best_index] <= 0 and optimizer.best_fit <= self.target
+
+
+class Stagnation(StoppingCriterion):
+
+    # No improvement of the best harmony for `iterations` improvisations
+    def __init__(self, iterations):
+        self.iterations = iterations
+
+    def start(self, optimizer):
+        self.best = None
+        self.improved_at = 0
+
+    def __call__(self, optimizer, iteration):
+        best = (optimizer.penalty_memory[optimizer.best_index], optimizer.best_fit)
+        if best != self.best:
+            self.best = best
+            self.improved_at = iteration
+        return iteration - self.improved_at >= self.iterations
+
+
+class TimeLimit(StoppingCriterion):
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def start(self, optimizer):
+        self.deadline = time.perf_counter() + self.seconds
+
+    def __call__(self, optimizer, iteration):
+        return time.perf_counter() >= self.deadline
+
+
+class MaxEvaluations(StoppingCriterion):
+
+    # Counts the evaluations of the initial memory as well
+    def __init__(self, evaluations):
+        self.evaluations = evaluations
+
+    def start(self, optimizer):
+        self.offset = optimizer.evaluations
+
+    def __call__(self, optimizer, iteration):
+        return optimizer.evaluations - self.offset >= self.evaluations
+
+
+class DiversityCollapse(StoppingCriterion):
+
+    # Memory is all feasible and its fitness spread has shrunk to
+    # `threshold` relative to the best fitness
+    def __init__(self, threshold=1e-6):
+        self.threshold = threshold
+
+    def __call__(self, optimizer, iteration):
+        if optimizer.penalty_memory[optimizer.worst_index] > 0:
+            return False
+        spread = optimizer.worst_fit - optimizer.best_fit
+        return spread <= self.threshold * max(abs(optimizer.best_fit), 1e-12)
+
+
+class LowDiversity(StoppingCriterion):
+
+    # Fewer than `threshold` of the memory rows are distinct. O(1) with a
+    # UniqueMemory index, a pass over memory otherwise.
+    def __init__(self, threshold=0.5):
+        self.threshold = threshold
+
+    def __call__(self, optimizer, iteration):
+        return optimizer.diversity() < self.threshold
+
+
+class HarmonySearch:
+
+    # Classic pitch adjustment: with probability PAR a value taken from
+    # memory moves by a bandwidth `bw`, a fraction of the variable's range
+    # (neighbouring value for Discrete, a fresh draw for Categorical).
+    # Subclasses schedule HMCR, PAR and bw over the run.
+    def __init__(self, bw=0.01):
+        self.bw = bw
+
+    def start(self, optimizer, hmcr, par, max_iter):
+        self.hmcr = hmcr
+        self.par = par
+        self.max_iter = max_iter
+
+    def parameters(self, optimizer, iteration):
+        return self.hmcr, self.par
+
+    # Returns the mask of values that no longer hold their memory value
+    def adjust(self, optimizer, new_harmonies, consider, adjust):
+        optimizer.space.adjust(new_harmonies, adjust, self.bw, optimizer.rng)
+        return adjust
+
+    # Masked values copied from the same column of the best harmony
+    @staticmethod
+    def copy_best(optimizer, new_harmonies, mask):
+        best = optimizer.harmony_memory[optimizer.best_index]
+        rows, columns = mask.nonzero()
+        new_harmonies[rows, columns] = best[columns]
+
+    def feedback(self, accepted):
+        pass
+
+    def get_state(self):
+        return {}
+
+    def set_state(self, state):
+        pass
+
+
+class ImprovedHarmonySearch(HarmonySearch):
+
+    # IHS: PAR grows linearly and bw shrinks exponentially over the run
+    def __init__(self, par_min=0.01, par_max=0.99, bw_min=1e-4, bw_max=0.1):
+        super().__init__(bw_max)
+        self.par_min = par_min
+        self.par_max = par_max
+        self.bw_min = bw_min
+        self.bw_max = bw_max
+
+    def parameters(self, optimizer, iteration):
+        progress = iteration / self.max_iter
+        self.bw = self.bw_max * math.exp(math.log(self.bw_min / self.bw_max) * progress)
+        return self.hmcr, self.par_min + (self.par_max - self.par_min) * progress
+
+
+class GlobalBestHarmonySearch(ImprovedHarmonySearch):
+
+    # GHS: the adjusted value is copied from the best harmony. The same
+    # variable is used rather than a random one, since variables may be
+    # of different kinds.
+    def __init__(self, par_min=0.01, par_max=0.99):
+        super().__init__(par_min, par_max)
+
+    def adjust(self, optimizer, new_harmonies, consider, adjust):
+        self.copy_best(optimizer, new_harmonies, adjust)
+        return adjust
+
+
+class SelfAdaptiveHarmonySearch(HarmonySearch):
+
+    # SGHS: HMCR and PAR are drawn around means learnt from the values
+    # that produced accepted harmonies over each learning period; every
+    # considered value moves by bw, which decreases linearly over the first
+    # half of the run, and is then copied from the best harmony with
+    # probability PAR.
+    def __init__(self, hmcr_mean=0.98, par_mean=0.9, bw_min=5e-4, bw_max=0.05, learning_period=100):
+        super().__init__(bw_max)
+        self.hmcr_mean = hmcr_mean
+        self.par_mean = par_mean
+        self.bw_min = bw_min
+        self.bw_max = bw_max
+        self.learning_period = learning_period
+
+    def start(self, optimizer, hmcr, par, max_iter):
+        super().start(optimizer, hmcr, par, max_iter)
+        self.successes = []
+        self.steps = 0
+
+    def parameters(self, optimizer, iteration):
+        progress = iteration / self.max_iter
+        self.bw = self.bw_max - (self.bw_max - self.bw_min) * 2 * progress if progress < 0.5 else self.bw_min
+        self.hmcr = float(np.clip(optimizer.rng.normal(self.hmcr_mean, 0.01), 0, 1))
+        self.par = float(np.clip(optimizer.rng.normal(self.par_mean, 0.05), 0, 1))
+        return self.hmcr, self.par
+
+    def adjust(self, optimizer, new_harmonies, consider, adjust):
+        optimizer.space.adjust(new_harmonies, consider, self.bw, optimizer.rng)
+        self.copy_best(optimizer, new_harmonies, adjust)
+        return consider
+
+    def feedback(self, accepted):
+        if accepted:
+            self.successes.append((self.hmcr, self.par))
+        self.steps += 1
+        if self.steps >= self.learning_period:
+            if self.successes:
+                self.hmcr_mean, self.par_mean = np.mean(self.successes, axis=0).tolist()
+            self.successes = []
+            self.steps = 0
+
+    def get_state(self):
+        return {'hmcr_mean': self.hmcr_mean, 'par_mean': self.par_mean,
+                'successes': self.successes, 'steps': self.steps}
+
+    def set_state(self, state):
+        self.hmcr_mean = state['hmcr_mean']
+        self.par_mean = state['par_mean']
+        self.successes = [tuple(success) for success in state['successes']]
+        self.steps = state['steps']
+
+
+class LocalSearch(ABC):
+
+    # Refinement stage run by optimize(refine=...) once harmony search has
+    # finished. The `starts` best memory harmonies are refined in turn,
+    # moving only their Continuous columns within bounds; Discrete,
+    # Categorical and Constant columns, and variables involved in
+    # dependencies, stay fixed. `budget` objective evaluations are shared
+    # by all starts, and an improved harmony replaces its start in memory.
+    def __init__(self, budget=500, starts=1):
+        self.budget = budget
+        self.starts = starts
+        self.evaluations = 0
+
+    @staticmethod
+    def key(fitness, penalty):
+        if penalty > 0:
+            return 1, penalty
+        return 0, fitness
+
+    def columns(self, optimizer):
+        fixed = set(optimizer._dependent)
+        for column in optimizer._dependent:
+            fixed.update(optimizer._positions[var] for var in optimizer.samplers[column].dependencies.values())
+        return np.array([column for column in np.flatnonzero(optimizer.space.continuous) if column not in fixed],
+                        dtype=int)
+
+    def refine(self, optimizer):
+        columns = self.columns(optimizer)
+        self.evaluations = 0
+        if not len(columns):
+            return
+        starts = sorted(range(len(optimizer.harmony_memory)), key=optimizer.ranking.key)[:self.starts]
+        for index in starts:
+            if self.evaluations >= self.budget:
+                break
+            fitness = optimizer.fitness_memory[index]
+            penalty = optimizer.penalty_memory[index]
+            harmony, new_fitness, new_penalty = self.search(optimizer, optimizer.harmony_memory[index].copy(),
+                                                            self.key(fitness, penalty), columns)
+            if self.key(new_fitness, new_penalty) < self.key(fitness, penalty):
+                optimizer.replace(index, harmony, new_fitness, new_penalty)
+
+    def evaluate(self, optimizer, harmony):
+        self.evaluations += 1
+        return optimizer.evaluate(harmony)
+
+    @abstractmethod
+    def search(self, optimizer, harmony, key, columns):
+        # -> (harmony, fitness, penalty) of the best point found
+        pass
+
+
+class PatternSearch(LocalSearch):
+
+    # Hooke-Jeeves pattern search: an exploratory sweep tries +/- step
+    # along each column and keeps every improvement; after a successful
+    # sweep the move is repeated as a pattern move, after a failed one
+    # the step (a fraction of the column's range) is halved.
+    def __init__(self, budget=500, starts=1, step=0.05, min_step=1e-7):
+        super().__init__(budget, starts)
+        self.step = step
+        self.min_step = min_step
+
+    def search(self, optimizer, harmony, key, columns):
+        self._best = harmony, key, math.inf, math.inf
+        base, base_key = harmony, key
+        step = self.step
+        while step >= self.min_step and self.evaluations < self.budget:
+            moved, moved_key = self._explore(optimizer, base, base_key, step, columns)
+            if not moved_key < base_key:
+                step /= 2
+                continue
+            while self.evaluations < self.budget:
+                pattern = moved + (moved - base)
+                pattern[columns] = np.clip(pattern[columns], optimizer.space.lower[columns],
+                                           optimizer.space.upper[columns])
+                base, base_key = moved, moved_key
+                moved, moved_key = self._explore(optimizer, pattern, self._key(optimizer, pattern), step, columns)
+                if not moved_key < base_key:
+                    break
+        best, key, fitness, penalty = self._best
+        return best, fitness, penalty
+
+    def _key(self, optimizer, harmony):
+        fitness, penalty = self.evaluate(optimizer, harmony)
+        key = self.key(fitness, penalty)
+        if key < self._best[1]:
+            self._best = harmony, key, fitness, penalty
+        return key
+
+    def _explore(self, optimizer, point, key, step, columns):
+        space = optimizer.space
+        for column in columns:
+            for direction in (1, -1):
+                if self.evaluations >= self.budget:
+                    return point, key
+                candidate = point.copy()
+                candidate[column] = min(max(point[column] + direction * step * space.span[column],
+                                            space.lower[column]), space.upper[column])
+                if candidate[column] == point[column]:
+                    continue
+                candidate_key = self._key(optimizer, candidate)
+                if candidate_key < key:
+                    point, key = candidate, candidate_key
+                    break
+        return point, key
+
+
+class NelderMead(LocalSearch):
+
+    # Nelder-Mead simplex over the continuous columns; points outside the
+    # bounds are clipped back onto them. The initial simplex extends by
+    # `step` times each column's range.
+    def __init__(self, budget=500, starts=1, step=0.05, tolerance=1e-8):
+        super().__init__(budget, starts)
+        self.step = step
+        self.tolerance = tolerance
+
+    def search(self, optimizer, harmony, key, columns):
+        lower = optimizer.space.lower[columns]
+        upper = optimizer.space.upper[columns]
+        span = optimizer.space.span[columns]
+
+        def point(values):
+            candidate = harmony.copy()
+            candidate[columns] = np.clip(values, lower, upper)
+            fitness, penalty = self.evaluate(optimizer, candidate)
+            return [self.key(fitness, penalty), candidate[columns], fitness, penalty]
+
+        start = harmony[columns]
+        simplex = [[key, start, math.inf, math.inf]]
+        for position in range(len(columns)):
+            if self.evaluations >= self.budget:
+                break
+            vertex = start.copy()
+            # Sınıra dayanmışsa içeri doğru
+            vertex[position] += self.step * span[position] * (1 if start[position] < upper[position] else -1)
+            simplex.append(point(vertex))
+
+        while self.evaluations < self.budget and len(simplex) == len(columns) + 1:
+            simplex.sort(key=lambda vertex: vertex[0])
+            vertices = np.array([vertex[1] for vertex in simplex])
+            if (np.abs(vertices - vertices[0]).max(axis=0) <= self.tolerance * span).all():
+                break
+            centroid = vertices[:-1].mean(axis=0)
+            worst = simplex[-1]
+            reflected = point(centroid + (centroid - worst[1]))
+            if reflected[0] < simplex[0][0] and self.evaluations < self.budget:
+                expanded = point(centroid + 2 * (centroid - worst[1]))
+                simplex[-1] = expanded if expanded[0] < reflected[0] else reflected
+            elif reflected[0] < simplex[-2][0]:
+                simplex[-1] = reflected
+            elif self.evaluations < self.budget:
+                contracted = point(centroid + 0.5 * (worst[1] - centroid))
+                if contracted[0] < worst[0]:
+                    simplex[-1] = contracted
+                else:
+                    best = simplex[0][1]
+                    for position in range(1, len(simplex)):
+                        if self.evaluations >= self.budget:
+                            break
+                        simplex[position] = point(best + 0.5 * (simplex[position][1] - best))
+
+        best = min(simplex, key=lambda vertex: vertex[0])
+        result = harmony.copy()
+        result[columns] = best[1]
+        return result, best[2], best[3]
 
 
 class Optimization(ABC):
 
-    def __init__(self, design, objective):
+    def __init__(self, design, objective, batch_objective=None, seed=None, cache=None, pitch=None, unique=None,
+                 surrogate=None, history=None, constraints=None):
 
         self.design = design
         self.objective = objective
-        self.harmony_memory = []
-        self.fitness_memory = []
-        self.penalty_memory = []
+        # batch_objective(X) -> (fitness[K], penalty[K]) for a (K, n_vars) value matrix
+        self.batch_objective = batch_objective
+        self.space = DesignSpace(design)
+        self.variables = self.space.variables
+        self.samplers = self.space.samplers
+        self._columns = np.arange(len(self.variables))
+        self._continuous = self.space.continuous
+        self._positions = {var: column for column, var in enumerate(self.variables)}
+        self._dependent = [column for column, sampler in enumerate(self.samplers) if sampler.dependencies]
+        for column in self._dependent:
+            for var in self.samplers[column].dependencies.values():
+                if self._positions.get(var, column) >= column:
+                    raise ValueError(f"'{self.variables[column]}' depends on '{var}', "
+                                     f"which must be declared before it")
+        # Sorted memory codes of every dependent column
+        self._memory_index = {}
+        # Every random draw of the optimizer and its samplers comes from here
+        self.rng = np.random.default_rng(seed)
+        # Optional EvaluationCache consulted before every objective call
+        self.cache = cache
+        # Optional UniqueMemory index over the memory rows
+        self.unique = unique
+        # Optional KNNSurrogate screening candidates before evaluation
+        self.surrogate = surrogate
+        if surrogate is not None:
+            surrogate.bind(self.space)
+        # Optional EvaluationArchive receiving every real evaluation
+        self.history = history
+        if history is not None:
+            history.bind(self.space)
+        # Constraints, cheapest first; their violations add to the penalty
+        # the objective returns, and the objective is skipped for
+        # harmonies they already rule out
+        self.constraints = sorted(constraints or (), key=lambda constraint: constraint.cost)
+        # Pitch adjustment strategy and its HMCR/PAR/bandwidth schedule
+        self.pitch = pitch or HarmonySearch()
+        # (HMS, n_vars) matrix of encoded harmonies, one row per harmony
+        self.harmony_memory = None
+        self.fitness_memory = None
+        self.penalty_memory = None
         self.best_fit = None
         self.best_index = None
         self.worst_fit = None
         self.worst_index = None
-        
+        self.ranking = None
+        self.convergence = None
+        # Objective evaluations so far, cache hits excluded
+        self.evaluations = 0
+        # Objective calls saved by the constraints
+        self.skipped = 0
+        self.stop_reason = None
+
+    def encode(self, harmony):
+        return self.space.encode(harmony)
+
+    def decode(self, row):
+        return self.space.decode(row)
+
+    def values(self, harmonies):
+        # Categorical columns keep their category index
+        return self.space.values(harmonies)
+
+    def get_harmony(self, index):
+        return self.decode(self.harmony_memory[index])
+
+    def cache_key(self, harmony):
+        return self.cache.key(harmony, self._continuous)
+
+    def in_memory(self, harmony):
+        return (self.unique is not None and self.unique.reject
+                and self.unique.key(harmony, self._continuous) in self.unique)
+
+    # Turns down a harmony before it is evaluated; counted as rejected
+    def is_duplicate(self, harmony):
+        if not self.in_memory(harmony):
+            return False
+        self.unique.rejected += 1
+        return True
+
+    def diversity(self):
+        if self.unique is not None:
+            return self.unique.diversity()
+        return len(np.unique(self.harmony_memory, axis=0)) / len(self.harmony_memory)
+
+    def evaluate(self, harmony):
+        if self.cache is None:
+            return self._evaluate(harmony)
+        key = self.cache_key(harmony)
+        result = self.cache.get(key)
+        if result is None:
+            result = self._evaluate(harmony)
+            if not math.isinf(result[0]):
+                self.cache.put(key, result)
+        return result
+
+    def _evaluate(self, harmony):
+        if self.objective is None or self.constraints:
+            fitness, penalty = self._evaluate_batch(harmony[np.newaxis])
+            return fitness[0], penalty[0]
+        self.evaluations += 1
+        result = self.objective(self.space.view(harmony))
+        self._observe(harmony[np.newaxis], [result[0]], [result[1]])
+        return result
+
+    def evaluate_batch(self, harmonies):
+        if self.cache is None:
+            return self._evaluate_batch(harmonies)
+        fitness = np.empty(len(harmonies))
+        penalty = np.empty(len(harmonies))
+        keys = [self.cache_key(harmony) for harmony in harmonies]
+        missing = []
+        for index, key in enumerate(keys):
+            result = self.cache.get(key)
+            if result is None:
+                missing.append(index)
+            else:
+                fitness[index], penalty[index] = result
+        if missing:
+            fitness[missing], penalty[missing] = self._evaluate_batch(harmonies[missing])
+            for index in missing:
+                # Skipped harmonies only hold a partial penalty
+                if not math.isinf(fitness[index]):
+                    self.cache.put(keys[index], (fitness[index], penalty[index]))
+        return fitness, penalty
+
+    def _evaluate_batch(self, harmonies):
+        if not len(harmonies):
+            return np.empty(0), np.empty(0)
+        if self.constraints:
+            return self._evaluate_constrained(harmonies)
+        fitness, penalty = self._call_objective(harmonies)
+        self._observe(harmonies, fitness, penalty)
+        return fitness, penalty
+
+    def _call_objective(self, harmonies):
+        self.evaluations += len(harmonies)
+        if self.batch_objective is None:
+            results = [self.objective(self.space.view(harmony)) for harmony in harmonies]
+            fitness, penalty = zip(*results)
+        else:
+            fitness, penalty = self.batch_objective(self.values(harmonies))
+        return np.asarray(fitness, dtype=float), np.asarray(penalty, dtype=float)
+
+    def _evaluate_constrained(self, harmonies):
+        # Harmonies the constraints rule out get fitness inf and their
+        # partial penalty; accepts() turns them down either way
+        penalty, rejected = self.constraint_penalty(harmonies, self.rejection_bound())
+        fitness = np.full(len(harmonies), np.inf)
+        kept = np.flatnonzero(~rejected)
+        self.skipped += len(harmonies) - len(kept)
+        if len(kept):
+            fitness[kept], objective_penalty = self._call_objective(harmonies[kept])
+            penalty[kept] += objective_penalty
+            self._observe(harmonies[kept], fitness[kept], penalty[kept])
+        return fitness, penalty
+
+    def rejection_bound(self):
+        # Penalty from which accepts() fails whatever the fitness: any
+        # violation against a feasible worst, otherwise the worst's penalty.
+        # Memory only improves, so a harmony ruled out now stays out.
+        if self.worst_index is None:
+            return np.inf
+        return max(float(self.penalty_memory[self.worst_index]), 0.0)
+
+    def constraint_penalty(self, harmonies, bound=np.inf):
+        # Summed violations and a mask of the harmonies whose partial sum
+        # reached `bound`; those are not checked against later constraints
+        penalty = np.zeros(len(harmonies))
+        alive = np.arange(len(harmonies))
+        values = None
+        for constraint in self.constraints:
+            if constraint.vectorized and values is None:
+                values = self.values(harmonies)
+            penalty[alive] += constraint.violation(self.space, harmonies[alive],
+                                                   None if values is None else values[alive])
+            partial = penalty[alive]
+            alive = alive[(partial <= 0) | (partial < bound)]
+            if not len(alive):
+                break
+        rejected = np.ones(len(harmonies), dtype=bool)
+        rejected[alive] = False
+        return penalty, rejected
+
+    def _observe(self, harmonies, fitness, penalty):
+        if self.surrogate is not None:
+            self.surrogate.observe(harmonies, fitness, penalty)
+        if self.history is not None:
+            self.history.append(harmonies, fitness, penalty, self.evaluations - len(harmonies))
+
+    def generate_random_harmonies(self, count):
+        harmonies = self.space.sample(count, self.rng)
+        if self._dependent:
+            for harmony in harmonies:
+                self._resolve_dependencies(harmony)
+        return harmonies
+
+    def _resolve_dependencies(self, harmony, consider=None, adjust=None):
+        # Dependent columns are kept within the bounds set by the variables
+        # they depend on. Memory consideration picks among the compatible
+        # memory values through the sorted per-column index, a pitch
+        # adjusted code is clipped into the range and anything else is
+        # drawn again.
+        for column in self._dependent:
+            sampler = self.samplers[column]
+            dependency_values = {var: self.samplers[self._positions[var]].decode(harmony[self._positions[var]])
+                                 for var in sampler.dependencies.values()}
+            min_val, max_val = sampler.bounds(dependency_values)
+            if adjust is not None and adjust[column]:
+                low, high = sampler.code_range(min_val, max_val)
+                if low <= high:
+                    harmony[column] = min(max(harmony[column], low), high)
+                    continue
+            if consider is not None and consider[column]:
+                low, high = sampler.code_range(min_val, max_val)
+                memory = self._memory_index[column]
+                start, stop = bisect_left(memory, low), bisect_right(memory, high)
+                if start < stop:
+                    harmony[column] = memory[start + int(self.rng.integers(stop - start))]
+                    continue
+            harmony[column] = sampler.sample_code_between(min_val, max_val, self.rng)
 
     def initialize_harmony_memory(self, size):
 
-        for _ in range(size):
-            harmony = {var: self.design[var].sample() for var in self.design}
-            fitness, penalty = self.objective(harmony)
+        # A fresh memory takes every harmony, nothing is skipped
+        self.worst_index = None
+        harmonies = self.generate_random_harmonies(size)
+        fitness, penalty = self.evaluate_batch(harmonies)
+        self.set_harmony_memory(harmonies, fitness, penalty)
+
+    def get_state(self, iteration):
+        state = {'harmony_memory': self.harmony_memory.copy(),
+                 'fitness_memory': self.fitness_memory.copy(),
+                 'penalty_memory': self.penalty_memory.copy(),
+                 'best_index': self.best_index,
+                 'worst_index': self.worst_index,
+                 'iteration': iteration,
+                 'evaluations': self.evaluations,
+                 'skipped': self.skipped,
+                 'rng_state': json.dumps(self.rng.bit_generator.state),
+                 'pitch_state': json.dumps(self.pitch.get_state())}
+        if self.surrogate is not None:
+            for name, value in self.surrogate.get_state().items():
+                state['surrogate_' + name] = value
+        if self.history is not None:
+            state['history_run'] = self.history.run
+        return state
 
-            self.harmony_memory.append(harmony)
-            self.fitness_memory.append(fitness)
-            self.penalty_memory.append(penalty)
-        self.find_best_worst(size)
+    def set_state(self, state):
+        self.set_harmony_memory(state['harmony_memory'], state['fitness_memory'], state['penalty_memory'])
+        self.rng.bit_generator.state = json.loads(str(state['rng_state']))
+        self.pitch.set_state(json.loads(str(state['pitch_state'])))
+        if 'evaluations' in state:
+            self.evaluations = int(state['evaluations'])
+            self.skipped = int(state['skipped'])
+        if self.surrogate is not None:
+            if 'surrogate_count' not in state:
+                raise ValueError("The checkpoint holds no surrogate state to resume from")
+            self.surrogate.set_state({name[len('surrogate_'):]: value for name, value in state.items()
+                                      if name.startswith('surrogate_')})
+        if self.history is not None and 'history_run' in state:
+            self.history.resume(int(state['history_run']), self.evaluations)
+        return int(state['iteration'])
+
+    def set_harmony_memory(self, harmonies, fitness, penalty):
+        # Copied, so that rows replace() overwrites are never shared with
+        # HarmonyViews handed out over the initial harmonies
+        harmonies = np.array(harmonies, dtype=float)
+        self.harmony_memory = harmonies
+        self.fitness_memory = np.asarray(fitness, dtype=float)
+        self.penalty_memory = np.asarray(penalty, dtype=float)
+        self._memory_index = {column: sorted(harmonies[:, column].tolist()) for column in self._dependent}
+        if self.unique is not None:
+            self.unique.rebuild(harmonies, self._continuous)
+        self.find_best_worst(len(harmonies))
 
 
 
     def find_best_worst(self, HMS):
 
-        valid_inds = [i for i, p in enumerate(self.penalty_memory) if p <= 0]
-        number_of_valid = len(valid_inds)
-
-        if number_of_valid == 0:  # Hepsi geçersiz çözüm ise
-            self.best_index = self.penalty_memory.index(min(self.penalty_memory))
-            self.best_fit = self.fitness_memory[self.best_index]
-            self.worst_index = max((idx for idx, val in enumerate(self.penalty_memory) if idx != self.best_index), key=lambda idx: self.penalty_memory[idx])
-            self.worst_fit = self.fitness_memory[self.worst_index]
-        elif number_of_valid == HMS:  # Hepsi geçerli çözüm ise
-            self.best_fit, self.best_index = min((fit, idx) for (idx, fit) in enumerate(self.fitness_memory))
-            self.worst_fit, self.worst_index = max((fit, idx) for (idx, fit) in enumerate(self.fitness_memory) if idx != self.best_index)
-        else:  # Kimi geçerli kimi geçersiz ise
-            self.worst_index = self.penalty_memory.index(max(self.penalty_memory))
-            self.worst_fit = self.fitness_memory[self.worst_index]
-            valid_fitness = [self.fitness_memory[i] for i in valid_inds]
-            self.best_fit, temp_index = min((fit, idx) for (idx, fit) in enumerate(valid_fitness))
-            self.best_index = valid_inds[temp_index]
+        self.ranking = MemoryRanking(self.fitness_memory, self.penalty_memory)
+        self._refresh_best_worst()
 
-    def generate_new_harmony(self, hmcr, par):
+    def _refresh_best_worst(self):
+        self.best_index = self.ranking.best()
+        self.worst_index = self.ranking.worst()
+        self.best_fit = float(self.fitness_memory[self.best_index])
+        self.worst_fit = float(self.fitness_memory[self.worst_index])
 
-        new_harmony = {}
-        for var in self.design:
+    def generate_new_harmony(self, hmcr, par):
 
-            if random.random() < hmcr:
-                new_harmony[var] = random.choice([h[var] for h in self.harmony_memory])
-            else:
-                new_harmony[var] = self.design[var].sample()
+        count = len(self.variables)
+        rows = self.rng.integers(len(self.harmony_memory), size=count)
+        new_harmony = self.harmony_memory[rows, self._columns]
+        draws = self.rng.random(2 * count)
+        consider = draws[:count] < hmcr
+        adjust = consider & (draws[count:] < par)
 
-            if random.random() < par:
-                new_harmony[var] = self.design[var].sample()
+        if not consider.all():
+            new_harmony = np.where(consider, new_harmony, self.space.sample(1, self.rng)[0])
+        moved = self.pitch.adjust(self, new_harmony[np.newaxis], consider[np.newaxis], adjust[np.newaxis])[0]
+        if self._dependent:
+            self._resolve_dependencies(new_harmony, consider & ~moved, moved)
         return new_harmony
-    
+
+    def generate_new_harmonies(self, hmcr, par, count):
+        # Every harmony of the batch is improvised from the same memory
+        shape = (count, len(self.variables))
+        rows = self.rng.integers(len(self.harmony_memory), size=shape)
+        new_harmonies = np.take_along_axis(self.harmony_memory, rows, axis=0)
+        consider = self.rng.random(shape) < hmcr
+        adjust = consider & (self.rng.random(shape) < par)
+
+        if not consider.all():
+            new_harmonies = np.where(consider, new_harmonies, self.space.sample(count, self.rng))
+        moved = self.pitch.adjust(self, new_harmonies, consider, adjust)
+        if self._dependent:
+            for new_harmony, from_memory, adjusted in zip(new_harmonies, consider & ~moved, moved):
+                self._resolve_dependencies(new_harmony, from_memory, adjusted)
+        return new_harmonies
+
+    def accepts(self, new_fitness, new_penalty):
+        worst_penalty = self.penalty_memory[self.worst_index]
+
+        if new_penalty > 0 and worst_penalty > 0:
+            return new_penalty < worst_penalty
+        elif new_penalty <= 0 and worst_penalty <= 0:
+            return new_fitness < self.worst_fit
+        return new_penalty <= 0
+
     def update_harmony_memory(self, new_harmony):
-        new_fitness, new_penalty = self.objective(new_harmony)
-
-        if new_penalty > 0 and self.penalty_memory[self.worst_index] > 0:
-            if new_penalty < self.penalty_memory[self.worst_index]:
-                self.harmony_memory[self.worst_index] = new_harmony
-                self.fitness_memory[self.worst_index] = new_fitness
-                self.penalty_memory[self.worst_index] = new_penalty
-
-        elif new_penalty <= 0 and self.penalty_memory[self.worst_index] <= 0:
-            if new_fitness < self.worst_fit:
-                self.harmony_memory[self.worst_index] = new_harmony
-                self.fitness_memory[self.worst_index] = new_fitness
-                self.penalty_memory[self.worst_index] = new_penalty
-
-        elif new_penalty <= 0 and self.penalty_memory[self.worst_index] > 0:
-            self.harmony_memory[self.worst_index] = new_harmony
-            self.fitness_memory[self.worst_index] = new_fitness
-            self.penalty_memory[self.worst_index] = new_penalty
-        self.find_best_worst(len(self.harmony_memory))
-        
-    
+        if isinstance(new_harmony, dict):
+            new_harmony = self.encode(new_harmony)
+        if self.is_duplicate(new_harmony):
+            return False
+        if self.surrogate is not None and not len(self.screen(new_harmony[np.newaxis])):
+            return False
+        new_fitness, new_penalty = self.evaluate(new_harmony)
+        return self.offer(new_harmony, new_fitness, new_penalty)
+
+    def update_harmony_memory_batch(self, new_harmonies):
+        new_harmonies = self.screen(self.drop_duplicates(new_harmonies))
+        fitnesses, penalties = self.evaluate_batch(new_harmonies)
+        return sum(self.offer(new_harmony, new_fitness, new_penalty)
+                   for new_harmony, new_fitness, new_penalty in zip(new_harmonies, fitnesses, penalties))
+
+    def drop_duplicates(self, new_harmonies):
+        # Harmonies already in memory; duplicates within the batch are
+        # caught by offer() once the first copy is stored
+        if self.unique is None or not self.unique.reject:
+            return new_harmonies
+        return new_harmonies[[not self.is_duplicate(new_harmony) for new_harmony in new_harmonies]]
+
+    def screen(self, new_harmonies):
+        # Candidates the surrogate expects to pass accepts(), plus a random
+        # `explore` share of the others
+        surrogate = self.surrogate
+        if surrogate is None or not surrogate.ready() or not len(new_harmonies):
+            return new_harmonies
+        fitness, penalty = surrogate.predict(new_harmonies)
+        worst_penalty = self.penalty_memory[self.worst_index]
+        if worst_penalty > 0:
+            promising = (penalty <= 0) | (penalty < worst_penalty)
+        else:
+            promising = (penalty <= 0) & (fitness < self.worst_fit)
+        promising |= self.rng.random(len(new_harmonies)) < surrogate.explore
+        passed = int(promising.sum())
+        surrogate.passed += passed
+        surrogate.screened += len(new_harmonies) - passed
+        return new_harmonies[promising]
+
+    def offer(self, new_harmony, new_fitness, new_penalty):
+        # Replaces the worst harmony if the evaluated candidate beats it.
+        # A copy stored earlier in the same batch is not counted as rejected,
+        # it has been evaluated already.
+        if not self.accepts(new_fitness, new_penalty) or self.in_memory(new_harmony):
+            return False
+        self.replace(self.worst_index, new_harmony, new_fitness, new_penalty)
+        return True
+
+    def replace(self, index, harmony, fitness, penalty):
+        for column in self._dependent:
+            memory = self._memory_index[column]
+            del memory[bisect_left(memory, self.harmony_memory[index, column])]
+            insort(memory, float(harmony[column]))
+        if self.unique is not None:
+            self.unique.replace(self.unique.key(self.harmony_memory[index], self._continuous),
+                                self.unique.key(harmony, self._continuous))
+        self.harmony_memory[index] = harmony
+        self.fitness_memory[index] = fitness
+        self.penalty_memory[index] = penalty
+        self.ranking.update(index)
+        self._refresh_best_worst()
+
+
 
 class Minimization(Optimization):
 
-    def optimize(self, hmcr=0.8, par=0.3, memory_size=20, max_iter=1000, log=False):
-        self.initialize_harmony_memory(memory_size)
+    def report(self, log, index, accepted):
+        if isinstance(log, ConvergenceLog):
+            log.record(index, self.best_fit, self.penalty_memory[self.best_index], accepted)
+            return ""
+        return self.log_iteration(index)
+
+    def log_iteration(self, index):
+        best_harmony = self.get_harmony(self.best_index)
+        best_penalty = self.penalty_memory[self.best_index]
+
+        out=(f"Iteration {index}, Harmony: {best_harmony}, Fitness: {self.best_fit}, Penalty: {best_penalty}")
+        print(out)
+        return out
+
+    def _profiled_step(self, profiler, hmcr, par, count):
+        clock = time.perf_counter
+        start = clock()
+        if count > 1:
+            new_harmonies = self.generate_new_harmonies(hmcr, par, count)
+        else:
+            new_harmonies = self.generate_new_harmony(hmcr, par)[np.newaxis]
+        improvised = clock()
+        evaluations = self.evaluations
+        new_harmonies = self.screen(self.drop_duplicates(new_harmonies))
+        fitnesses, penalties = self.evaluate_batch(new_harmonies)
+        evaluated = clock()
+        best = self.ranking.key(self.best_index)
+        accepted = sum(self.offer(new_harmony, new_fitness, new_penalty)
+                       for new_harmony, new_fitness, new_penalty in zip(new_harmonies, fitnesses, penalties))
+        updated = clock()
+        profiler.record(improvised - start, evaluated - improvised, updated - evaluated,
+                        count, self.evaluations - evaluations, accepted)
+        return accepted, self.ranking.key(self.best_index) < best
+
+    def start_criteria(self, stop):
+        if stop is None:
+            return []
+        if isinstance(stop, StoppingCriterion):
+            stop = [stop]
+        for criterion in stop:
+            criterion.start(self)
+        return stop
+
+    def check_criteria(self, stop, index):
+        for criterion in stop:
+            if criterion(self, index):
+                self.stop_reason = type(criterion).__name__
+                return True
+        return False
+
+    def optimize(self, hmcr=0.8, par=0.3, memory_size=20, max_iter=1000, log=False, batch_size=1,
+                 checkpoint=None, resume_from=None, profiler=None, stop=None, pitch=None, refine=None):
+        if pitch is not None:
+            self.pitch = pitch
+        self.pitch.start(self, hmcr, par, max_iter)
+        if isinstance(checkpoint, str):
+            checkpoint = Checkpoint(checkpoint)
+        stop = self.start_criteria(stop)
+        self.stop_reason = 'max_iter'
+        # Best fitness after each improvisation
+        self.convergence = np.empty(max_iter)
+        if resume_from is None:
+            self.initialize_harmony_memory(memory_size)
+            index = 0
+        else:
+            state = load_checkpoint(resume_from)
+            index = self.set_state(state)
+            self.convergence[:index] = state['convergence'][:max_iter]
         out=""
-        for index in range(max_iter):
-            new_harmony = self.generate_new_harmony(hmcr, par)
-            self.update_harmony_memory(new_harmony)
+        while index < max_iter:
+            hmcr, par = self.pitch.parameters(self, index)
+            if profiler is not None:
+                count = min(batch_size, max_iter - index)
+                accepted, improved = self._profiled_step(profiler, hmcr, par, count)
+            elif batch_size > 1:
+                count = min(batch_size, max_iter - index)
+                new_harmonies = self.generate_new_harmonies(hmcr, par, count)
+                accepted = self.update_harmony_memory_batch(new_harmonies) > 0
+            else:
+                count = 1
+                new_harmony = self.generate_new_harmony(hmcr, par)
+                accepted = self.update_harmony_memory(new_harmony)
+            self.pitch.feedback(accepted)
+            self.convergence[index:index + count] = self.best_fit
+            index += count
+            if profiler is not None:
+                profiler.end_iteration(self, index, improved)
 
             if log:
-                best_harmony = self.harmony_memory[self.best_index]
-                best_penalty = self.penalty_memory[self.best_index]
-                
-                out=(f"Iteration {index+1}, Harmony: {best_harmony}, Fitness: {self.best_fit}, Penalty: {best_penalty}")
-                if log:
-                    print(out)
+                out = self.report(log, index, accepted)
+            if (checkpoint is not None and index // checkpoint.every > (index - count) // checkpoint.every
+                    and not checkpoint.busy()):
+                if self.history is not None:
+                    self.history.flush()
+                checkpoint.save(self.get_state(index), self.convergence[checkpoint.traced:index])
+            if stop and self.check_criteria(stop, index):
+                self.convergence = self.convergence[:index]
+                break
+        if refine is not None:
+            refine.refine(self)
+        if isinstance(log, ConvergenceLog):
+            log.close()
+        if self.history is not None:
+            self.history.flush()
+        if checkpoint is not None:
+            checkpoint.wait()
+            checkpoint.save(self.get_state(index), self.convergence[checkpoint.traced:index], block=True)
         return out,self.best_fit
-        
@@ -1,12 +1,6 @@
 from PyHarmonyOptimizer import *
 import math
-from functools import lru_cache
 import time
-import os
-
-os_system = os.name
-
-os.system('cls')
 
 class WeldedBeamDesign:
     YOUNGS_MODULUS = 30e6
@@ -57,7 +51,6 @@ class WeldedBeamDesign:
 
         penalties = sum(max(0, constraint) for constraint in constraints[:self.NUMBER_OF_CONSTRAINTS])
         return penalties
-    @lru_cache(maxsize=None)
     def fitness(self):
         penalty = self.compute_penalty()
         the_fitness = 1.10471 * self.beam_width ** 2 * self.beam_height + 0.04811 * self.beam_thickness * self. \
@@ -65,33 +58,41 @@ class WeldedBeamDesign:
         the_reference = penalty*1000+3  if penalty > 0 else the_fitness
         return the_reference, the_fitness, penalty
 
+    @classmethod
+    def design(cls):
+        return {'beam_width': Continuous(0.1, 2),
+                'beam_height': Continuous(0.1, 10),
+                'beam_thickness': Continuous(0.1, 10),
+                'weld_width': Continuous(0.1, 2)}
+
     @classmethod
     def optimize_beam_design(cls):
-        design = {'beam_width': Continuous(0.1, 2),
-                  'beam_height': Continuous(0.1, 10),
-                  'beam_thickness': Continuous(0.1, 10),
-                  'weld_width': Continuous(0.1, 2)}
-
-        def objective_function(harmony):
-            beam = cls(harmony['beam_width'], harmony['beam_height'], harmony['beam_thickness'],
-                                    harmony['weld_width'])
-            return beam.fitness()
-
-        optimizer = Minimization(design, objective_function)
-        
-        cls.running= optimizer.optimize(max_iter=cls.MAX_ITERATIONS,
+        optimizer = Minimization(cls.design(), beam_objective)
+
+        out, best_fit = optimizer.optimize(max_iter=cls.MAX_ITERATIONS,
                               memory_size=cls.MEMORY_SIZE,
                               par=cls.PAR_PARAMETER,
                               hmcr=cls.HMCR_PARAMETER,
                               log=cls.ISLOG)
         if cls.SHOWMEMORY:
-            optimizer.print_harmony_memory()
-        return cls.running
-        
+            for index in range(len(optimizer.harmony_memory)):
+                print(optimizer.get_harmony(index), optimizer.fitness_memory[index], optimizer.penalty_memory[index])
+        return optimizer.get_harmony(optimizer.best_index), best_fit
 
     @classmethod
-    def print_solution(cls):
-        harmony, fitness = cls.running
+    def optimize_beam_designs(cls, workers=None):
+        # Süreç havuzu yalnızca paralel koşularda yüklenir
+        from parallel import run_many
+        return run_many(cls.design(), beam_objective, cls.RUN, workers=workers,
+                        max_iter=cls.MAX_ITERATIONS,
+                        memory_size=cls.MEMORY_SIZE,
+                        par=cls.PAR_PARAMETER,
+                        hmcr=cls.HMCR_PARAMETER)
+
+
+    @classmethod
+    def print_solution(cls, solution):
+        harmony, fitness = solution
         output = f"Details of the best solution:\n"
         output += '\n'.join([f"  {key}: {value}" for key, value in harmony.items()])
         output += f"\nFitness value: {fitness}\n\n"
@@ -101,7 +102,7 @@ class WeldedBeamDesign:
             with open(cls.OUTPUT_FILE, 'a') as f:
                 # f.write(output)
                 pass
-        return fitness[0]
+        return fitness
 
     @classmethod
     def get_fitness_for_specific_design(clc,beam_width, beam_height, beam_thickness, weld_width):
@@ -118,13 +119,21 @@ class WeldedBeamDesign:
             )
 
 
+def beam_objective(harmony):
+    # Module level so that worker processes can unpickle it
+    beam = WeldedBeamDesign(harmony['beam_width'], harmony['beam_height'], harmony['beam_thickness'],
+                            harmony['weld_width'])
+    reference, fitness, penalty = beam.fitness()
+    return fitness, penalty
+
+
 if __name__ == "__main__":
     try:
         start=time.time()
-        for run_number in range(WeldedBeamDesign.RUN):
+        results = WeldedBeamDesign.optimize_beam_designs()
+        for run_number, result in enumerate(results):
             print(f"{run_number + 1}. run:")
-            current_solution = WeldedBeamDesign.optimize_beam_design()
-            WeldedBeamDesign.print_solution()
+            WeldedBeamDesign.print_solution((result.best_harmony, result.best_fit))
         #WeldedBeamDesign.get_fitness_for_specific_design(0.206741, 3.65285, 8.54856, 0.231265)
         end=time.time()
         print("süre:",end-start)
@@ -1,3 +1,45 @@
 # PyHarmonyOptimizer/__init__.py
 
 """PyHarmonyOptimizer: Harmony algoritması tabanlı optimizasyon modülü."""
+
+import importlib
+
+from .PyHarmonyOptimizer import (
+    Sampler, Continuous, Discrete, Constant, Categorical, DesignSpace, HarmonyView, Constraint,
+    EvaluationCache, UniqueMemory, KNNSurrogate,
+    ConvergenceLog, read_convergence_log, Checkpoint, load_checkpoint, Profiler,
+    EvaluationArchive, read_history, decode_history,
+    StoppingCriterion, TargetFitness, Stagnation, TimeLimit, MaxEvaluations, DiversityCollapse, LowDiversity,
+    HarmonySearch, ImprovedHarmonySearch, GlobalBestHarmonySearch, SelfAdaptiveHarmonySearch,
+    LocalSearch, PatternSearch, NelderMead,
+    Optimization, Minimization,
+)
+
+# Süreç havuzu, asyncio ve çok amaçlı modüller ilk kullanımda yüklenir;
+# `import pyharmonyoptimizer` yalnızca çekirdeği getirir.
+_LAZY = {
+    'ParallelMinimization': 'parallel',
+    'IslandMinimization': 'parallel',
+    'IslandResult': 'parallel',
+    'RunResult': 'parallel',
+    'run_many': 'parallel',
+    'worker_pool': 'parallel',
+    'AsyncMinimization': 'async_optimizer',
+    'MultiObjectiveMinimization': 'multiobjective',
+    'ParetoArchive': 'multiobjective',
+    'fast_non_dominated_sort': 'multiobjective',
+    'crowding_distance': 'multiobjective',
+}
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module('.' + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
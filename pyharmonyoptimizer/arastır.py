@@ -1,4 +1,11 @@
+from PyHarmonyOptimizer import read_convergence_log
+
+
 def parse_harmony_data(file_path):
+    # Logs written by ConvergenceLog need no text parsing
+    if file_path.endswith(('.csv', '.npz', '.parquet')):
+        return [{'Iteration': int(record['iteration']), 'Fitness': float(record['best_fit']),
+                 'Penalty': float(record['best_penalty'])} for record in read_convergence_log(file_path)]
     results = []
     with open(file_path, 'r') as file:
         for line in file:
@@ -9,4 +16,6 @@ def parse_harmony_data(file_path):
                 penalty = float(parts[3].split(': ')[1])
                 results.append({'Iteration': iteration, 'Fitness': fitness, 'Penalty': penalty})
     return results
-parse_harmony_data("en_iyi_sonuc103.txt")
\ No newline at end of file
+
+if __name__ == "__main__":
+    parse_harmony_data("en_iyi_sonuc103.txt")
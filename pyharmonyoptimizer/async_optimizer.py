@@ -0,0 +1,96 @@
+#async_optimizer.py
+import asyncio
+
+import numpy as np
+
+try:
+    from .PyHarmonyOptimizer import ConvergenceLog, Minimization
+except ImportError:
+    # Run as a script from this directory
+    from PyHarmonyOptimizer import ConvergenceLog, Minimization
+
+
+class AsyncMinimization(Minimization):
+
+    # For objectives that mostly wait (a simulation server, a solver
+    # subprocess): `objective` is an `async def objective(harmony)` returning
+    # (fitness, penalty). Up to `concurrency` evaluations run at once on the
+    # event loop and each result is offered to memory as it arrives. All
+    # memory updates happen on the loop thread, one at a time.
+    def __init__(self, design, objective, concurrency=8, seed=None, cache=None, pitch=None, unique=None):
+        super().__init__(design, objective, seed=seed, cache=cache, pitch=pitch, unique=unique)
+        self.concurrency = concurrency
+
+    async def evaluate_async(self, harmony):
+        if self.cache is None:
+            self.evaluations += 1
+            return await self.objective(self.space.view(harmony))
+        key = self.cache_key(harmony)
+        result = self.cache.get(key)
+        if result is None:
+            self.evaluations += 1
+            result = await self.objective(self.space.view(harmony))
+            self.cache.put(key, result)
+        return result
+
+    async def initialize_harmony_memory_async(self, size):
+        harmonies = self.generate_random_harmonies(size)
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def evaluate(harmony):
+            async with limit:
+                return await self.evaluate_async(harmony)
+
+        fitness, penalty = zip(*await asyncio.gather(*(evaluate(harmony) for harmony in harmonies)))
+        self.set_harmony_memory(harmonies, fitness, penalty)
+
+    async def optimize_async(self, hmcr=0.8, par=0.3, memory_size=20, max_iter=1000, log=False, stop=None,
+                             pitch=None):
+        if pitch is not None:
+            self.pitch = pitch
+        self.pitch.start(self, hmcr, par, max_iter)
+        stop = self.start_criteria(stop)
+        self.stop_reason = 'max_iter'
+        await self.initialize_harmony_memory_async(memory_size)
+        self.convergence = np.empty(max_iter)
+        out = ""
+        pending = {}
+        submitted = completed = 0
+        try:
+            while completed < max_iter:
+                while submitted < max_iter and len(pending) < self.concurrency:
+                    new_harmony = self.generate_new_harmony(*self.pitch.parameters(self, submitted))
+                    if self.is_duplicate(new_harmony):
+                        # Counts as a rejected improvisation, nothing to evaluate
+                        task = asyncio.get_running_loop().create_future()
+                        task.set_result(None)
+                    else:
+                        task = asyncio.ensure_future(self.evaluate_async(new_harmony))
+                    pending[task] = new_harmony
+                    submitted += 1
+
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in [task for task in pending if task in done]:
+                    new_harmony = pending.pop(task)
+                    result = task.result()
+                    accepted = result is not None and self.offer(new_harmony, *result)
+                    self.pitch.feedback(accepted)
+                    self.convergence[completed] = self.best_fit
+                    completed += 1
+                    if log:
+                        out = self.report(log, completed, accepted)
+                    if stop and self.check_criteria(stop, completed):
+                        self.convergence = self.convergence[:completed]
+                        return out, self.best_fit
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            if isinstance(log, ConvergenceLog):
+                log.close()
+        return out, self.best_fit
+
+    def optimize(self, hmcr=0.8, par=0.3, memory_size=20, max_iter=1000, log=False, stop=None, pitch=None):
+        # Blocking entry point; use optimize_async from inside a running loop
+        return asyncio.run(self.optimize_async(hmcr, par, memory_size, max_iter, log, stop, pitch))
@@ -1,4 +1,5 @@
 #main.py
+import numpy as np
 from PyHarmonyOptimizer import *
 
 
@@ -43,6 +44,39 @@ def obj_func(harmony):
 
     return the_fitness, penalty
 
-optimizer = Minimization(design_space, obj_func)
-optimizer.optimize(hmcr=0.9, par=0.2, memory_size=20, max_iter=5000, log=True)
+def batch_obj_func(X):
+    # obj_func applied to a (K, 4) matrix of harmonies at once
+    x1, x2, x3, x4 = X.T
 
+
+    tomax, sigmamax, deltamax, p, l, ee, g , ng= [13600, 30000, 0.25, 6000, 14, 30e6, 12e6, 7]
+    dx = (4 * p * l ** 3) / (ee * x3 ** 3 * x4)
+    sx = (6 * p * l) / (x4 * x3 ** 2)
+    pc = (4.013 * ee * ((x3 ** 2 * x4 ** 6) / 36) ** 0.5) / (l ** 2) * (1 - x3 / (2 * l) * (ee / (4 * g)) ** 0.5)
+    m = p * (l + x2 / 2)
+    r = (x2 ** 2 / 4 + ((x1 + x3) / 2) ** 2) ** 0.5
+    j = 2 * (x1 * x2 * 2 ** 0.5 * ((x2 ** 2) / 12 + ((x1 + x3) / 2) ** 2))
+    t1 = p / (x1 * x2 * 2 ** 0.5)
+    t2 = m * r / j
+    tox = (t1 ** 2 + t2 ** 2 + 2 * x2 * t1 * t2 / (2 * r)) ** 0.5
+
+    constraints = np.array([
+        tox - tomax,
+        sx - sigmamax,
+        x1 - x4,
+        0.10471 * x1 ** 2 + 0.04811 * x3 * x4 * (14 + x2) - 5,
+        0.125 - x1,
+        dx - deltamax,
+        p - pc
+    ])
+
+
+    penalty = np.maximum(0, constraints[:ng]).sum(axis=0)
+
+    the_fitness = 1.10471 * x1 ** 2 * x2 + 0.04811 * x3 * x4 * (14 + x2)
+
+    return the_fitness, penalty
+
+if __name__ == "__main__":
+    optimizer = Minimization(design_space, obj_func, batch_objective=batch_obj_func)
+    optimizer.optimize(hmcr=0.9, par=0.2, memory_size=20, max_iter=5000, log=True, batch_size=50)
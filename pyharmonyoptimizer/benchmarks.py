@@ -0,0 +1,384 @@
+#benchmarks.py
+# Benchmark suite for the optimizer core. Results are written as JSON so
+# that runs from different commits can be compared:
+#
+#   python benchmarks.py --output before.json
+#   python benchmarks.py --output after.json --compare before.json
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+
+import numpy as np
+
+from PyHarmonyOptimizer import *
+
+
+# evaluate(X) -> (fitness[K], penalty[K]) for a (K, n_vars) value matrix
+Problem = namedtuple('Problem', ['name', 'design', 'evaluate', 'target'])
+
+
+def _penalty(constraints):
+    return np.maximum(0, np.array(constraints)).sum(axis=0)
+
+
+def welded_beam_problem():
+    def evaluate(X):
+        x1, x2, x3, x4 = X.T
+        p, l, ee, g = 6000, 14, 30e6, 12e6
+        dx = (4 * p * l ** 3) / (ee * x3 ** 3 * x4)
+        sx = (6 * p * l) / (x4 * x3 ** 2)
+        pc = (4.013 * ee * ((x3 ** 2 * x4 ** 6) / 36) ** 0.5) / (l ** 2) * (1 - x3 / (2 * l) * (ee / (4 * g)) ** 0.5)
+        m = p * (l + x2 / 2)
+        r = (x2 ** 2 / 4 + ((x1 + x3) / 2) ** 2) ** 0.5
+        j = 2 * (x1 * x2 * 2 ** 0.5 * ((x2 ** 2) / 12 + ((x1 + x3) / 2) ** 2))
+        t1 = p / (x1 * x2 * 2 ** 0.5)
+        t2 = m * r / j
+        tox = (t1 ** 2 + t2 ** 2 + 2 * x2 * t1 * t2 / (2 * r)) ** 0.5
+        fitness = 1.10471 * x1 ** 2 * x2 + 0.04811 * x3 * x4 * (14 + x2)
+        return fitness, _penalty([tox - 13600, sx - 30000, x1 - x4,
+                                  0.10471 * x1 ** 2 + 0.04811 * x3 * x4 * (14 + x2) - 5,
+                                  0.125 - x1, dx - 0.25, p - pc])
+
+    design = {'x1': Continuous(0.1, 2), 'x2': Continuous(0.1, 10),
+              'x3': Continuous(0.1, 10), 'x4': Continuous(0.1, 2)}
+    return Problem('welded_beam', design, evaluate, 2.0)
+
+
+def pressure_vessel_problem():
+    def evaluate(X):
+        x1, x2, x3, x4 = X.T
+        fitness = (0.6224 * x1 * x3 * x4 + 1.7781 * x2 * x3 ** 2
+                   + 3.1661 * x1 ** 2 * x4 + 19.84 * x1 ** 2 * x3)
+        return fitness, _penalty([-x1 + 0.0193 * x3, -x2 + 0.00954 * x3,
+                                  (-math.pi * x3 ** 2 * x4 - 4 / 3 * math.pi * x3 ** 3 + 1296000) / 1296000,
+                                  x4 - 240])
+
+    thicknesses = [0.0625 * k for k in range(1, 100)]
+    design = {'x1': Discrete(thicknesses), 'x2': Discrete(thicknesses),
+              'x3': Continuous(10, 200), 'x4': Continuous(10, 200)}
+    return Problem('pressure_vessel', design, evaluate, 6500.0)
+
+
+def spring_problem():
+    def evaluate(X):
+        x1, x2, x3 = X.T
+        fitness = (x3 + 2) * x2 * x1 ** 2
+        return fitness, _penalty([1 - x2 ** 3 * x3 / (71785 * x1 ** 4),
+                                  (4 * x2 ** 2 - x1 * x2) / (12566 * (x2 * x1 ** 3 - x1 ** 4))
+                                  + 1 / (5108 * x1 ** 2) - 1,
+                                  1 - 140.45 * x1 / (x2 ** 2 * x3),
+                                  (x1 + x2) / 1.5 - 1])
+
+    design = {'x1': Continuous(0.05, 2), 'x2': Continuous(0.25, 1.3), 'x3': Continuous(2, 15)}
+    return Problem('spring', design, evaluate, 0.0135)
+
+
+def rosenbrock_problem(dimension):
+    def evaluate(X):
+        fitness = (100 * (X[:, 1:] - X[:, :-1] ** 2) ** 2 + (1 - X[:, :-1]) ** 2).sum(axis=1)
+        return fitness, np.zeros(len(X))
+
+    design = {f'x{i}': Continuous(-5, 10) for i in range(dimension)}
+    return Problem(f'rosenbrock_{dimension}', design, evaluate, 100.0 * dimension)
+
+
+def rastrigin_problem(dimension):
+    def evaluate(X):
+        fitness = 10 * X.shape[1] + (X ** 2 - 10 * np.cos(2 * math.pi * X)).sum(axis=1)
+        return fitness, np.zeros(len(X))
+
+    design = {f'x{i}': Continuous(-5.12, 5.12) for i in range(dimension)}
+    return Problem(f'rastrigin_{dimension}', design, evaluate, 5.0 * dimension)
+
+
+# Pitch adjustment strategies, selectable with --variants
+VARIANTS = {'hs': HarmonySearch, 'ihs': ImprovedHarmonySearch,
+            'ghs': GlobalBestHarmonySearch, 'sghs': SelfAdaptiveHarmonySearch}
+
+
+class CountingObjective:
+
+    # Scalar objective built from a problem's batch evaluation; counts calls
+    def __init__(self, problem):
+        self.evaluate = problem.evaluate
+        self.variables = list(problem.design)
+        self.calls = 0
+
+    def __call__(self, harmony):
+        self.calls += 1
+        fitness, penalty = self.evaluate(np.array([[harmony[var] for var in self.variables]], dtype=float))
+        return fitness[0], penalty[0]
+
+    def batch(self, X):
+        self.calls += len(X)
+        return self.evaluate(X)
+
+
+def problems(dimensions=(10, 50)):
+    yield welded_beam_problem()
+    yield pressure_vessel_problem()
+    yield spring_problem()
+    for dimension in dimensions:
+        yield rosenbrock_problem(dimension)
+        yield rastrigin_problem(dimension)
+
+
+class TargetTimer(StoppingCriterion):
+
+    # Never stops the run; notes when the target is first reached
+    def __init__(self, target):
+        self.target = target
+
+    def start(self, optimizer):
+        self.started = time.perf_counter()
+        self.seconds = None
+
+    def __call__(self, optimizer, iteration):
+        if (self.seconds is None and optimizer.penalty_memory[optimizer.best_index] <= 0
+                and optimizer.best_fit <= self.target):
+            self.seconds = time.perf_counter() - self.started
+        return False
+
+
+def run_case(problem, memory_size, max_iter, batch_size=1, seed=0, measure_memory=True, variant='hs'):
+    objective = CountingObjective(problem)
+    optimizer = Minimization(problem.design, objective,
+                             batch_objective=objective.batch if batch_size > 1 else None, seed=seed)
+    log = ConvergenceLog()
+    timer = TargetTimer(problem.target)
+    start = time.perf_counter()
+    optimizer.optimize(memory_size=memory_size, max_iter=max_iter, batch_size=batch_size, log=log,
+                       pitch=VARIANTS[variant](), stop=timer)
+    elapsed = time.perf_counter() - start
+
+    records = log.records()
+    reached = records[(records['best_penalty'] <= 0) & (records['best_fit'] <= problem.target)]
+    iterations_to_target = int(reached['iteration'][0]) if len(reached) else None
+
+    peak_memory = None
+    if measure_memory:
+        tracemalloc.start()
+        Minimization(problem.design, CountingObjective(problem), seed=seed).optimize(
+            memory_size=memory_size, max_iter=max_iter, batch_size=batch_size, pitch=VARIANTS[variant]())
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {'problem': problem.name,
+            'n_vars': len(problem.design),
+            'memory_size': memory_size,
+            'max_iter': max_iter,
+            'batch_size': batch_size,
+            'variant': variant,
+            'seed': seed,
+            'wall_time': elapsed,
+            'iterations_per_sec': max_iter / elapsed,
+            'evaluations_per_sec': objective.calls / elapsed,
+            'best_fit': optimizer.best_fit,
+            'best_penalty': float(optimizer.penalty_memory[optimizer.best_index]),
+            'target': problem.target,
+            'iterations_to_target': iterations_to_target,
+            'time_to_target': timer.seconds,
+            'peak_memory_bytes': peak_memory}
+
+
+def run_micro(problem, memory_size, calls=2000, seed=0, repeats=5):
+    # Per-call cost of the memory hot paths, objective excluded. Each
+    # timing is the best of `repeats` runs from the same fresh state, so
+    # that scheduler noise does not show up as a regression.
+    timings = {}
+    for _ in range(repeats):
+        for name, seconds in _time_micro(problem, memory_size, calls, seed).items():
+            timings[name] = min(seconds, timings.get(name, math.inf))
+    return {'problem': problem.name, 'n_vars': len(problem.design), 'memory_size': memory_size,
+            'seconds_per_call': timings}
+
+
+def _time_micro(problem, memory_size, calls, seed):
+    optimizer = Minimization(problem.design, None, batch_objective=problem.evaluate, seed=seed)
+    optimizer.initialize_harmony_memory(memory_size)
+    harmonies = [optimizer.generate_new_harmony(0.8, 0.3) for _ in range(calls)]
+    fitness, penalty = problem.evaluate(np.array(harmonies))
+    optimizer.objective = lambda harmony, results=iter(zip(fitness, penalty)): next(results)
+    optimizer.batch_objective = None
+
+    timings = {}
+    start = time.perf_counter()
+    for _ in range(calls):
+        optimizer.generate_new_harmony(0.8, 0.3)
+    timings['generate_new_harmony'] = (time.perf_counter() - start) / calls
+    start = time.perf_counter()
+    for harmony in harmonies:
+        optimizer.update_harmony_memory(harmony)
+    timings['update_harmony_memory'] = (time.perf_counter() - start) / calls
+    # The incremental best/worst step replace() takes after each
+    # acceptance: one changed row, then the new best and worst
+    rows = optimizer.rng.integers(memory_size, size=calls)
+    start = time.perf_counter()
+    for index, new_fitness, new_penalty in zip(rows, fitness, penalty):
+        optimizer.fitness_memory[index] = new_fitness
+        optimizer.penalty_memory[index] = new_penalty
+        optimizer.ranking.update(index)
+        optimizer._refresh_best_worst()
+    timings['update_best_worst'] = (time.perf_counter() - start) / calls
+    return timings
+
+
+# Modules that `import pyharmonyoptimizer` must leave unloaded
+LAZY_MODULES = ('concurrent.futures', 'multiprocessing', 'asyncio', 'pyarrow',
+                'pyharmonyoptimizer.parallel', 'pyharmonyoptimizer.async_optimizer',
+                'pyharmonyoptimizer.multiobjective')
+
+_IMPORT_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import pyharmonyoptimizer
+seconds = time.perf_counter() - start
+print(json.dumps({'seconds': seconds, 'loaded': [name for name in %r if name in sys.modules]}))
+'''
+
+
+def run_import(budget=0.5, repeats=5):
+    # Cold `import pyharmonyoptimizer` in fresh interpreters, median time
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    probes = []
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, '-c', _IMPORT_PROBE % (LAZY_MODULES,)], capture_output=True,
+                             text=True, check=True, cwd=root).stdout
+        probes.append(json.loads(out))
+    seconds = float(np.median([probe['seconds'] for probe in probes]))
+    loaded = sorted({name for probe in probes for name in probe['loaded']})
+    return {'seconds': seconds, 'budget': budget, 'loaded': loaded,
+            'within_budget': seconds <= budget and not loaded}
+
+
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit, 'python': platform.python_version(), 'numpy': np.__version__,
+            'platform': platform.platform(), 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def run_suite(memory_sizes=(10, 50, 200), dimensions=(10, 50), max_iter=2000, batch_sizes=(1, 50),
+              seeds=(0, 1, 2), measure_memory=True, variants=('hs',), import_budget=0.5):
+    cases = []
+    for problem in problems(dimensions):
+        for memory_size in memory_sizes:
+            for batch_size in batch_sizes:
+                for variant in variants:
+                    runs = [run_case(problem, memory_size, max_iter, batch_size, seed, measure_memory, variant)
+                            for seed in seeds]
+                    cases.append(_median_case(runs))
+    micro = [run_micro(problem, memory_size) for problem in problems(dimensions) for memory_size in memory_sizes]
+    return {'metadata': metadata(), 'cases': cases, 'micro': micro, 'import': run_import(import_budget)}
+
+
+def _median_case(runs):
+    case = dict(runs[0])
+    del case['seed']
+    case['runs'] = len(runs)
+    for name in ('wall_time', 'iterations_per_sec', 'evaluations_per_sec', 'best_fit', 'peak_memory_bytes'):
+        values = [run[name] for run in runs if run[name] is not None]
+        case[name] = float(np.median(values)) if values else None
+    reached = [run['time_to_target'] for run in runs if run['time_to_target'] is not None]
+    case['time_to_target'] = float(np.median(reached)) if reached else None
+    case['iterations_to_target'] = [run['iterations_to_target'] for run in runs]
+    case['target_reached'] = len(reached)
+    return case
+
+
+def _case_key(case):
+    return case['problem'], case['memory_size'], case['batch_size'], case.get('variant', 'hs')
+
+
+def compare(current, baseline, threshold=0.1):
+    # Cases whose throughput dropped by more than `threshold`
+    previous = {_case_key(case): case for case in baseline['cases']}
+    regressions = []
+    for case in current['cases']:
+        old = previous.get(_case_key(case))
+        if old is None:
+            continue
+        ratio = case['iterations_per_sec'] / old['iterations_per_sec']
+        if ratio < 1 - threshold:
+            regressions.append((_case_key(case), ratio))
+    return regressions
+
+
+def compare_micro(current, baseline, threshold=0.5):
+    # Hot paths that got slower by more than `threshold`. Per-call timings
+    # of a few microseconds are noisier than whole cases, hence the wider
+    # default; timings the baseline does not have are skipped.
+    previous = {(case['problem'], case['memory_size']): case for case in baseline.get('micro', [])}
+    slower = []
+    for case in current.get('micro', []):
+        old = previous.get((case['problem'], case['memory_size']))
+        if old is None:
+            continue
+        for name, seconds in case['seconds_per_call'].items():
+            if name not in old['seconds_per_call']:
+                continue
+            ratio = old['seconds_per_call'][name] / seconds
+            if ratio < 1 - threshold:
+                slower.append(((case['problem'], case['memory_size'], name), ratio))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PyHarmonyOptimizer benchmarks")
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', help="earlier results file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.1)
+    parser.add_argument('--micro-threshold', type=float, default=0.5,
+                        help="allowed slowdown of the per-call micro timings")
+    parser.add_argument('--max-iter', type=int, default=2000)
+    parser.add_argument('--memory-sizes', type=int, nargs='+', default=[10, 50, 200])
+    parser.add_argument('--dimensions', type=int, nargs='+', default=[10, 50])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 50])
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0, 1, 2])
+    parser.add_argument('--variants', nargs='+', default=['hs'], choices=sorted(VARIANTS))
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc peak memory runs")
+    parser.add_argument('--import-budget', type=float, default=0.5,
+                        help="seconds allowed for a cold `import pyharmonyoptimizer`")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.memory_sizes, args.dimensions, args.max_iter, args.batch_sizes,
+                        args.seeds, not args.no_memory, args.variants, args.import_budget)
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2)
+    for case in results['cases']:
+        print(f"{case['problem']:>16} HMS={case['memory_size']:<4} batch={case['batch_size']:<3} "
+              f"{case['variant']:<4} "
+              f"{case['iterations_per_sec']:>10.0f} it/s  best={case['best_fit']:.6g}  "
+              f"target {case['target_reached']}/{case['runs']}")
+    probe = results['import']
+    print(f"import pyharmonyoptimizer: {probe['seconds'] * 1000:.0f} ms (budget {probe['budget'] * 1000:.0f} ms)")
+    status = 0
+    if not probe['within_budget']:
+        print(f"IMPORT OVER BUDGET, eagerly loaded: {', '.join(probe['loaded']) or 'none'}")
+        status = 1
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        for key, ratio in regressions:
+            print(f"REGRESSION {key}: {ratio:.2f}x of baseline")
+        slower = compare_micro(results, baseline, args.micro_threshold)
+        for key, ratio in slower:
+            print(f"MICRO REGRESSION {key}: {ratio:.2f}x of baseline")
+        return 1 if regressions or slower else status
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+#multiobjective.py
+import numpy as np
+
+try:
+    from .PyHarmonyOptimizer import ConvergenceLog, Minimization
+except ImportError:
+    # Run as a script from this directory
+    from PyHarmonyOptimizer import ConvergenceLog, Minimization
+
+
+def dominance_matrix(objectives, others=None, weak=False, chunk=512):
+    # D[i, j] is True when objectives[i] dominates others[j] (objectives
+    # itself by default); with weak=True equal points count as dominated.
+    # Compared one objective at a time over row chunks, so temporaries stay
+    # at (chunk, N).
+    if others is None:
+        others = objectives
+    matrix = np.empty((len(objectives), len(others)), dtype=bool)
+    for start in range(0, len(objectives), chunk):
+        block = objectives[start:start + chunk]
+        at_most = np.ones((len(block), len(others)), dtype=bool)
+        below = np.zeros((len(block), len(others)), dtype=bool)
+        for column in range(objectives.shape[1]):
+            mine, theirs = block[:, column, np.newaxis], others[:, column]
+            at_most &= mine <= theirs
+            if not weak:
+                below |= mine < theirs
+        matrix[start:start + chunk] = at_most if weak else at_most & below
+    return matrix
+
+
+def fast_non_dominated_sort(objectives):
+    # Fronts as index arrays, first front first
+    matrix = dominance_matrix(objectives)
+    counts = matrix.sum(axis=0)
+    fronts = []
+    front = np.flatnonzero(counts == 0)
+    while len(front):
+        fronts.append(front)
+        counts -= matrix[front].sum(axis=0)
+        counts[front] = -1
+        front = np.flatnonzero(counts == 0)
+    return fronts
+
+
+def crowding_distance(objectives):
+    count, n_objectives = objectives.shape
+    if count <= 2:
+        return np.full(count, np.inf)
+    distance = np.zeros(count)
+    for column in range(n_objectives):
+        order = np.argsort(objectives[:, column], kind='stable')
+        values = objectives[order, column]
+        distance[order[[0, -1]]] = np.inf
+        span = values[-1] - values[0]
+        if span > 0:
+            distance[order[1:-1]] += (values[2:] - values[:-2]) / span
+    return distance
+
+
+def select(objectives, penalty, size):
+    # Constrained NSGA-II selection: feasible fronts first, the last front
+    # that fits only partly is cut by crowding distance; infeasible rows
+    # follow as one front ordered by penalty. Returns (indices, ranks).
+    feasible = np.flatnonzero(penalty <= 0)
+    infeasible = np.flatnonzero(penalty > 0)
+    fronts = [feasible[front] for front in fast_non_dominated_sort(objectives[feasible])]
+    chosen, ranks = [], []
+    for rank, front in enumerate(fronts):
+        if len(chosen) + len(front) > size:
+            crowding = crowding_distance(objectives[front])
+            front = front[np.argsort(-crowding, kind='stable')[:size - len(chosen)]]
+        chosen.extend(front)
+        ranks.extend([rank] * len(front))
+        if len(chosen) == size:
+            break
+    missing = size - len(chosen)
+    if missing > 0:
+        front = infeasible[np.argsort(penalty[infeasible], kind='stable')[:missing]]
+        chosen.extend(front)
+        ranks.extend([len(fronts)] * len(front))
+    return np.array(chosen, dtype=int), np.array(ranks, dtype=float)
+
+
+class ParetoArchive:
+
+    # Feasible non-dominated harmonies found so far. A batch of candidates
+    # is compared with itself and with the whole archive in vectorized
+    # dominance checks. With a capacity, the most crowded points are
+    # dropped once it is exceeded.
+    def __init__(self, capacity=None):
+        self.capacity = capacity
+        self.harmonies = None
+        self.objectives = None
+
+    def __len__(self):
+        return 0 if self.objectives is None else len(self.objectives)
+
+    def add(self, harmonies, objectives, chunk=1024):
+        return sum(self._add(harmonies[start:start + chunk], objectives[start:start + chunk])
+                   for start in range(0, len(objectives), chunk))
+
+    def _add(self, harmonies, objectives):
+        # Non-dominated within the batch, one copy of repeated points
+        keep = ~dominance_matrix(objectives).any(axis=0)
+        harmonies, objectives = harmonies[keep], objectives[keep]
+        _, first = np.unique(objectives, axis=0, return_index=True)
+        first.sort()
+        harmonies, objectives = harmonies[first], objectives[first]
+        if self.objectives is None:
+            self.harmonies, self.objectives = harmonies.copy(), objectives.copy()
+        else:
+            new = ~dominance_matrix(self.objectives, objectives, weak=True).any(axis=0)
+            harmonies, objectives = harmonies[new], objectives[new]
+            if not len(objectives):
+                return 0
+            kept = ~dominance_matrix(objectives, self.objectives).any(axis=0)
+            self.harmonies = np.concatenate([self.harmonies[kept], harmonies])
+            self.objectives = np.concatenate([self.objectives[kept], objectives])
+        added = len(objectives)
+        if self.capacity is not None:
+            while len(self) > self.capacity:
+                keep = np.ones(len(self), dtype=bool)
+                keep[np.argmin(crowding_distance(self.objectives))] = False
+                self.harmonies = self.harmonies[keep]
+                self.objectives = self.objectives[keep]
+        return added
+
+
+class MultiObjectiveMinimization(Minimization):
+
+    # objective(harmony) -> (objectives, penalty) where objectives is a
+    # vector to be minimized; batch_objective(X) -> (F[K, m], penalty[K]).
+    # Each step the memory and the new harmonies compete and the best
+    # `memory_size` survive by constrained non-dominated rank and crowding
+    # distance. fitness_memory holds the rank, objective_memory the
+    # vectors. Every feasible non-dominated harmony goes to `archive`.
+    def __init__(self, design, objective, batch_objective=None, seed=None, pitch=None, unique=None, archive=None):
+        super().__init__(design, objective, batch_objective=batch_objective, seed=seed, pitch=pitch, unique=unique)
+        self.archive = archive if archive is not None else ParetoArchive()
+        self.objective_memory = None
+
+    def _survive(self, harmonies, objectives, penalty, size):
+        chosen, ranks = select(objectives, penalty, size)
+        self.objective_memory = objectives[chosen]
+        self.set_harmony_memory(harmonies[chosen], ranks, penalty[chosen])
+        return chosen
+
+    def _archive(self, harmonies, objectives, penalty):
+        feasible = penalty <= 0
+        return self.archive.add(harmonies[feasible], objectives[feasible])
+
+    def initialize_harmony_memory(self, size):
+        harmonies = self.generate_random_harmonies(size)
+        objectives, penalty = self._evaluate_batch(harmonies)
+        self._archive(harmonies, objectives, penalty)
+        self._survive(harmonies, objectives, penalty, size)
+
+    def step(self, hmcr, par, count):
+        if count > 1:
+            new_harmonies = self.generate_new_harmonies(hmcr, par, count)
+        else:
+            new_harmonies = self.generate_new_harmony(hmcr, par)[np.newaxis]
+        new_harmonies = self.drop_duplicates(new_harmonies)
+        if not len(new_harmonies):
+            return 0
+        objectives, penalty = self._evaluate_batch(new_harmonies)
+        self._archive(new_harmonies, objectives, penalty)
+        size = len(self.harmony_memory)
+        chosen = self._survive(np.concatenate([self.harmony_memory, new_harmonies]),
+                               np.concatenate([self.objective_memory, objectives]),
+                               np.concatenate([self.penalty_memory, penalty]), size)
+        return int((chosen >= size).sum())
+
+    def pareto_front(self):
+        # (harmonies as dicts, (N, m) objective matrix) of the archive
+        if not len(self.archive):
+            return [], np.empty((0, 0))
+        return [self.decode(row) for row in self.archive.harmonies], self.archive.objectives.copy()
+
+    def log_iteration(self, index):
+        out = f"Iteration {index}, Pareto front: {len(self.archive)} harmonies"
+        print(out)
+        return out
+
+    def report(self, log, index, accepted):
+        # A ConvergenceLog gets the archive size in its best_fit column,
+        # as in the convergence trace
+        if isinstance(log, ConvergenceLog):
+            log.record(index, len(self.archive), self.penalty_memory[self.best_index], accepted)
+            return ""
+        return self.log_iteration(index)
+
+    def optimize(self, hmcr=0.8, par=0.3, memory_size=20, max_iter=1000, log=False, batch_size=1, stop=None,
+                 pitch=None):
+        # `stop` takes the criteria that do not rely on a scalar best
+        # fitness: TimeLimit, MaxEvaluations, LowDiversity.
+        if pitch is not None:
+            self.pitch = pitch
+        self.pitch.start(self, hmcr, par, max_iter)
+        stop = self.start_criteria(stop)
+        self.stop_reason = 'max_iter'
+        self.initialize_harmony_memory(memory_size)
+        # Archive size after each improvisation
+        self.convergence = np.empty(max_iter)
+        out = ""
+        index = 0
+        while index < max_iter:
+            hmcr, par = self.pitch.parameters(self, index)
+            count = min(batch_size, max_iter - index)
+            accepted = self.step(hmcr, par, count) > 0
+            self.pitch.feedback(accepted)
+            self.convergence[index:index + count] = len(self.archive)
+            index += count
+            if log:
+                out = self.report(log, index, accepted)
+            if stop and self.check_criteria(stop, index):
+                self.convergence = self.convergence[:index]
+                break
+        if isinstance(log, ConvergenceLog):
+            log.close()
+        return out, self.pareto_front()
@@ -72,24 +72,25 @@ class Harcama:
         return sonuclar
 
 # Kullanım örneği
-cari_A = Cari("Cari A", 10000)
-cari_A.para_ekle(2000, "Elden")
-print(cari_A.durum_goster())
+if __name__ == "__main__":
+    cari_A = Cari("Cari A", 10000)
+    cari_A.para_ekle(2000, "Elden")
+    print(cari_A.durum_goster())
 
-harcama1 = Harcama("Santiye A", "Malzeme Alımı", "2023-12-01", "Fiş", "Ahmet", "Yıldız İnşaat", 1000, "Cari A")
-harcama2 = Harcama("Santiye B", "Taşıma", "2023-12-02", "Makbuz", "Mehmet", "Güneş Nakliyat", 1500, "Cari A")
+    harcama1 = Harcama("Santiye A", "Malzeme Alımı", "2023-12-01", "Fiş", "Ahmet", "Yıldız İnşaat", 1000, "Cari A")
+    harcama2 = Harcama("Santiye B", "Taşıma", "2023-12-02", "Makbuz", "Mehmet", "Güneş Nakliyat", 1500, "Cari A")
 
-# Harcamaları listeleme
-Harcama.harcamalari_listele()
+    # Harcamaları listeleme
+    Harcama.harcamalari_listele()
 
-# Harcama Güncelleme
-Harcama.harcama_guncelle(harcama1, {"miktar": 1200})
-print(Harcama.cari_hesaplar["Cari A"].durum_goster())
+    # Harcama Güncelleme
+    Harcama.harcama_guncelle(harcama1, {"miktar": 1200})
+    print(Harcama.cari_hesaplar["Cari A"].durum_goster())
 
-# Harcama Silme
-Harcama.harcama_sil(harcama2)
-print(Harcama.cari_hesaplar["Cari A"].durum_goster())
+    # Harcama Silme
+    Harcama.harcama_sil(harcama2)
+    print(Harcama.cari_hesaplar["Cari A"].durum_goster())
 
-# Tarihe göre filtreleme
-for harcama in Harcama.filtrele(tarih=(datetime(2023, 12, 1), datetime(2023, 12, 31))):
-    print(harcama)
+    # Tarihe göre filtreleme
+    for harcama in Harcama.filtrele(tarih=(datetime(2023, 12, 1), datetime(2023, 12, 31))):
+        print(harcama)
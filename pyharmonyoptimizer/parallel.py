@@ -0,0 +1,400 @@
+#parallel.py
+import multiprocessing
+import os
+import queue
+import time
+import traceback
+import weakref
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from threading import BrokenBarrierError
+
+import numpy as np
+
+try:
+    from .PyHarmonyOptimizer import ConvergenceLog, HarmonySearch, Minimization
+except ImportError:
+    # Run as a script from this directory
+    from PyHarmonyOptimizer import ConvergenceLog, HarmonySearch, Minimization
+
+
+# Executors built by worker_pool() already hold the design and objective,
+# so tasks only carry the encoded harmony row.
+_shipped = weakref.WeakKeyDictionary()
+_worker = None
+
+
+def _init_worker(design, objective):
+    global _worker
+    _worker = Minimization(design, objective)
+
+
+def _evaluate_shipped(harmony):
+    return _worker.evaluate(harmony)
+
+
+def _evaluate(design, objective, harmony):
+    return Minimization(design, objective).evaluate(harmony)
+
+
+def worker_pool(design, objective, workers=None):
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(design, objective))
+    _shipped[executor] = (design, objective)
+    return executor
+
+
+class ParallelMinimization(Minimization):
+
+    # Keeps `in_flight` improvised harmonies evaluating on an executor and
+    # folds results into memory with the usual replacement rules. With
+    # ordered=True results are folded in submission order, so a seeded run
+    # is reproducible regardless of worker timing.
+    def __init__(self, design, objective, workers=None, executor=None, ordered=False, seed=None, cache=None,
+                 unique=None):
+        super().__init__(design, objective, seed=seed, cache=cache, unique=unique)
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = executor
+        self.ordered = ordered
+
+    def _submit_cached(self, executor, harmony):
+        # Cache hits never reach the executor; misses carry their key so
+        # the result can be stored once it is folded. Duplicates of memory
+        # rows complete at once with no result.
+        if self.is_duplicate(harmony):
+            future = Future()
+            future.set_result(None)
+            return future, None
+        if self.cache is None:
+            return self._submit(executor, harmony), None
+        key = self.cache_key(harmony)
+        result = self.cache.get(key)
+        if result is None:
+            return self._submit(executor, harmony), key
+        future = Future()
+        future.set_result(result)
+        return future, None
+
+    def _submit(self, executor, harmony):
+        self.evaluations += 1
+        shipped = _shipped.get(executor)
+        if shipped is not None and shipped[0] is self.design and shipped[1] is self.objective:
+            return executor.submit(_evaluate_shipped, harmony)
+        return executor.submit(_evaluate, self.design, self.objective, harmony)
+
+    def initialize_harmony_memory(self, size, executor=None):
+        if executor is None:
+            return super().initialize_harmony_memory(size)
+        harmonies = self.generate_random_harmonies(size)
+        futures = [self._submit(executor, harmony) for harmony in harmonies]
+        fitness, penalty = zip(*(future.result() for future in futures))
+        self.set_harmony_memory(harmonies, fitness, penalty)
+
+    def optimize(self, hmcr=0.8, par=0.3, memory_size=20, max_iter=1000, log=False, in_flight=None, stop=None,
+                 pitch=None):
+        if pitch is not None:
+            self.pitch = pitch
+        self.pitch.start(self, hmcr, par, max_iter)
+        stop = self.start_criteria(stop)
+        self.stop_reason = 'max_iter'
+        executor = self.executor
+        if executor is None:
+            executor = worker_pool(self.design, self.objective, self.workers)
+        in_flight = in_flight or 2 * self.workers
+        try:
+            self.initialize_harmony_memory(memory_size, executor)
+            self.convergence = np.empty(max_iter)
+            out = ""
+            pending = deque()
+            submitted = completed = 0
+            stopped = False
+            while completed < max_iter and not stopped:
+                while submitted < max_iter and len(pending) < in_flight:
+                    new_harmony = self.generate_new_harmony(*self.pitch.parameters(self, submitted))
+                    future, key = self._submit_cached(executor, new_harmony)
+                    pending.append((future, new_harmony, key))
+                    submitted += 1
+
+                if self.ordered:
+                    finished = [pending.popleft()]
+                else:
+                    done, _ = wait([item[0] for item in pending], return_when=FIRST_COMPLETED)
+                    finished = [item for item in pending if item[0] in done]
+                    for item in finished:
+                        pending.remove(item)
+
+                for future, new_harmony, key in finished:
+                    result = future.result()
+                    if key is not None:
+                        self.cache.put(key, result)
+                    accepted = result is not None and self.offer(new_harmony, *result)
+                    self.pitch.feedback(accepted)
+                    self.convergence[completed] = self.best_fit
+                    completed += 1
+                    if log:
+                        out = self.report(log, completed, accepted)
+                    if stop and self.check_criteria(stop, completed):
+                        self.convergence = self.convergence[:completed]
+                        stopped = True
+                        break
+            for future, _, _ in pending:
+                future.cancel()
+            if isinstance(log, ConvergenceLog):
+                log.close()
+        finally:
+            if self.executor is None:
+                executor.shutdown(cancel_futures=True)
+        return out, self.best_fit
+
+
+RunResult = namedtuple('RunResult', ['seed', 'best_fit', 'best_penalty', 'best_harmony', 'convergence', 'wall_time'])
+
+
+def _run_replica(design, objective, seed, options):
+    start = time.perf_counter()
+    optimizer = Minimization(design, objective, seed=seed)
+    optimizer.optimize(**options)
+    return RunResult(seed=seed,
+                     best_fit=optimizer.best_fit,
+                     best_penalty=float(optimizer.penalty_memory[optimizer.best_index]),
+                     best_harmony=optimizer.get_harmony(optimizer.best_index),
+                     convergence=optimizer.convergence,
+                     wall_time=time.perf_counter() - start)
+
+
+def run_many(design, objective, n_runs, seeds=None, workers=None, **options):
+    # Independent Minimization replicas, one process-pool task each.
+    # `options` are passed to Minimization.optimize.
+    if seeds is None:
+        seeds = np.random.SeedSequence().generate_state(n_runs)
+    seeds = [int(seed) for seed in seeds]
+    if len(seeds) != n_runs:
+        raise ValueError(f"Expected {n_runs} seeds, got {len(seeds)}")
+    options.setdefault('log', False)
+
+    if workers == 1:
+        return [_run_replica(design, objective, seed, options) for seed in seeds]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_run_replica, design, objective, seed, options) for seed in seeds]
+        return [future.result() for future in futures]
+
+
+IslandResult = namedtuple('IslandResult', ['island', 'seed', 'harmony_memory', 'fitness_memory', 'penalty_memory',
+                                           'convergence', 'penalties', 'accepted', 'evaluations',
+                                           'immigrants', 'stop_reason'])
+
+
+def _ranked(fitness, penalty):
+    # Memory rows ordered best first by the feasibility-first rule
+    feasible = penalty <= 0
+    return np.lexsort((np.where(feasible, fitness, penalty), ~feasible))
+
+
+def _neighbours(topology, island, islands):
+    if topology == 'ring':
+        return [(island + 1) % islands]
+    return [other for other in range(islands) if other != island]
+
+
+class _Island(Minimization):
+
+    def __init__(self, design, objective, batch_objective, seed, pitch, inboxes, neighbours, barrier, stopped):
+        super().__init__(design, objective, batch_objective=batch_objective, seed=seed, pitch=pitch)
+        self.inboxes = inboxes
+        self.neighbours = neighbours
+        self.barrier = barrier
+        self.stopped = stopped
+        self.immigrants = 0
+        self.exchanges = 0
+        # Messages of later exchanges that arrived early
+        self._early = []
+
+    def migrate(self, island, migrants, incoming):
+        self.exchanges += 1
+        best = _ranked(self.fitness_memory, self.penalty_memory)[:migrants]
+        message = (self.exchanges, island, self.harmony_memory[best], self.fitness_memory[best],
+                   self.penalty_memory[best])
+        for neighbour in self.neighbours:
+            self.inboxes[neighbour].put(message)
+        # Every island reads `stopped` between the two barriers, so none can
+        # set it before the others have read it and all agree on when to stop.
+        self.barrier.wait()
+        stopped = self.stopped.is_set()
+        self.barrier.wait()
+        # Queues deliver in no fixed order across senders: a fast neighbour's
+        # next message can overtake a slow one's. Messages are matched to
+        # this exchange and offered in sender order, so that a seeded run is
+        # reproducible.
+        messages = [message for message in self._early if message[0] == self.exchanges]
+        self._early = [message for message in self._early if message[0] != self.exchanges]
+        while len(messages) < incoming:
+            message = self.inboxes[island].get()
+            (messages if message[0] == self.exchanges else self._early).append(message)
+        messages.sort(key=lambda message: message[1])
+        for _, _, harmonies, fitnesses, penalties in messages:
+            for harmony, fitness, penalty in zip(harmonies, fitnesses, penalties):
+                # Bir önceki göçle gelmiş olabilir
+                if not (self.harmony_memory == harmony).all(axis=1).any():
+                    self.immigrants += self.offer(harmony.copy(), fitness, penalty)
+        return stopped
+
+    def run(self, island, incoming, hmcr, par, memory_size, max_iter, batch_size, stop, interval, migrants):
+        self.pitch.start(self, hmcr, par, max_iter)
+        stop = self.start_criteria(stop)
+        self.stop_reason = 'max_iter'
+        self.initialize_harmony_memory(memory_size)
+        convergence = np.empty(max_iter)
+        penalties = np.empty(max_iter)
+        accepted = np.zeros(max_iter, dtype=bool)
+        index = 0
+        while index < max_iter:
+            hmcr, par = self.pitch.parameters(self, index)
+            count = min(batch_size, max_iter - index, interval - index % interval)
+            if count > 1:
+                accepted[index] = self.update_harmony_memory_batch(self.generate_new_harmonies(hmcr, par, count)) > 0
+            else:
+                accepted[index] = self.update_harmony_memory(self.generate_new_harmony(hmcr, par))
+            self.pitch.feedback(accepted[index])
+            convergence[index:index + count] = self.best_fit
+            penalties[index:index + count] = self.penalty_memory[self.best_index]
+            index += count
+            # The other islands learn of it at their next regular exchange
+            met = bool(stop) and self.check_criteria(stop, index)
+            if met:
+                self.stopped.set()
+            if index % interval == 0 or index == max_iter or met:
+                if self.migrate(island, migrants, incoming):
+                    if self.stop_reason == 'max_iter':
+                        self.stop_reason = 'island'
+                    break
+                # Göçmenler en iyiyi değiştirmiş olabilir
+                convergence[index - 1] = self.best_fit
+                penalties[index - 1] = self.penalty_memory[self.best_index]
+        return convergence[:index], penalties[:index], accepted[:index]
+
+
+def _run_island(island, seed, design, objective, batch_objective, pitch, inboxes, neighbours, incoming,
+                barrier, stopped, results, options):
+    try:
+        optimizer = _Island(design, objective, batch_objective, seed, pitch, inboxes, neighbours, barrier, stopped)
+        convergence, penalties, accepted = optimizer.run(island, incoming, **options)
+        results.put(IslandResult(island=island, seed=seed,
+                                 harmony_memory=optimizer.harmony_memory,
+                                 fitness_memory=optimizer.fitness_memory,
+                                 penalty_memory=optimizer.penalty_memory,
+                                 convergence=convergence, penalties=penalties, accepted=accepted,
+                                 evaluations=optimizer.evaluations, immigrants=optimizer.immigrants,
+                                 stop_reason=optimizer.stop_reason))
+    except BrokenBarrierError:
+        results.put((island, None))
+    except Exception:
+        # Islands blocked at the barrier would otherwise wait forever
+        barrier.abort()
+        results.put((island, traceback.format_exc()))
+
+
+class IslandMinimization(Minimization):
+
+    # Runs `islands` independent harmony memories in separate processes.
+    # Every `migration_interval` improvisations each island sends copies of
+    # its `migrants` best harmonies to its neighbours ('ring': the next
+    # island, 'full': every other island), where they are offered to memory
+    # with the usual replacement rules. After optimize() this optimizer
+    # holds the best `memory_size` harmonies found across all islands.
+    TOPOLOGIES = ('ring', 'full')
+
+    def __init__(self, design, objective, islands=None, topology='ring', migration_interval=100, migrants=1,
+                 batch_objective=None, seed=None):
+        super().__init__(design, objective, batch_objective=batch_objective, seed=seed)
+        if topology not in self.TOPOLOGIES:
+            raise ValueError(f"Unknown topology '{topology}', expected one of {self.TOPOLOGIES}")
+        self.islands = islands or os.cpu_count() or 1
+        self.topology = topology
+        self.migration_interval = migration_interval
+        self.migrants = migrants
+        self.seed = seed
+        self.results = None
+
+    def optimize(self, hmcr=0.8, par=0.3, memory_size=20, max_iter=1000, log=False, batch_size=1, stop=None,
+                 pitch=None):
+        # max_iter, stop and pitch apply to every island; an island meeting
+        # a stopping criterion stops all islands at the next migration.
+        context = multiprocessing.get_context()
+        seeds = [int(state) for state in np.random.SeedSequence(self.seed).generate_state(self.islands)]
+        inboxes = [context.Queue() for _ in range(self.islands)]
+        barrier = context.Barrier(self.islands)
+        stopped = context.Event()
+        results = context.Queue()
+        options = {'hmcr': hmcr, 'par': par, 'memory_size': memory_size, 'max_iter': max_iter,
+                   'batch_size': batch_size, 'stop': stop, 'interval': self.migration_interval,
+                   'migrants': min(self.migrants, memory_size)}
+        incoming = [0] * self.islands
+        for island in range(self.islands):
+            for neighbour in _neighbours(self.topology, island, self.islands):
+                incoming[neighbour] += 1
+
+        processes = [context.Process(target=_run_island,
+                                     args=(island, seed, self.design, self.objective, self.batch_objective,
+                                           pitch or HarmonySearch(), inboxes,
+                                           _neighbours(self.topology, island, self.islands),
+                                           incoming[island], barrier, stopped, results, options))
+                     for island, seed in enumerate(seeds)]
+        for process in processes:
+            process.start()
+        try:
+            collected = self._collect(results, processes)
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+        self.results = sorted(collected, key=lambda result: result.island)
+        self._merge(memory_size)
+        out = ""
+        if isinstance(log, ConvergenceLog):
+            for index, record in enumerate(zip(self.convergence, self._penalties, self._accepted), 1):
+                log.record(index, *record)
+            log.close()
+        elif log:
+            out = self.log_iteration(len(self.convergence))
+        return out, self.best_fit
+
+    def _collect(self, results, processes):
+        collected, errors = [], []
+        while len(collected) + len(errors) < len(processes):
+            try:
+                result = results.get(timeout=0.1)
+            except queue.Empty:
+                if any(process.exitcode not in (None, 0) for process in processes):
+                    raise RuntimeError("An island process exited unexpectedly")
+                continue
+            if isinstance(result, IslandResult):
+                collected.append(result)
+            elif result[1] is not None:
+                errors.append(result[1])
+        if errors:
+            raise RuntimeError(f"Island failed:\n{errors[0]}")
+        return collected
+
+    def _merge(self, memory_size):
+        harmonies = np.concatenate([result.harmony_memory for result in self.results])
+        fitness = np.concatenate([result.fitness_memory for result in self.results])
+        penalty = np.concatenate([result.penalty_memory for result in self.results])
+        best = _ranked(fitness, penalty)[:memory_size]
+        self.set_harmony_memory(harmonies[best], fitness[best], penalty[best])
+        self.evaluations = sum(result.evaluations for result in self.results)
+        reasons = [result.stop_reason for result in self.results if result.stop_reason not in ('max_iter', 'island')]
+        self.stop_reason = reasons[0] if reasons else 'max_iter'
+
+        # Best of all islands after each improvisation round
+        length = min(len(result.convergence) for result in self.results)
+        fitness = np.array([result.convergence[:length] for result in self.results])
+        penalty = np.array([result.penalties[:length] for result in self.results])
+        # Feasible traces first, then the smallest penalty
+        feasible = penalty <= 0
+        best = np.where(feasible.any(axis=0), np.where(feasible, fitness, np.inf).argmin(axis=0),
+                        penalty.argmin(axis=0))
+        columns = np.arange(length)
+        self.convergence = fitness[best, columns]
+        self._penalties = penalty[best, columns]
+        self._accepted = np.array([result.accepted[:length] for result in self.results]).any(axis=0)
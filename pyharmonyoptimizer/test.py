@@ -1,9 +1,10 @@
-sonuclar = []
+if __name__ == "__main__":
+    sonuclar = []
 
-with open('sonuclar92.txt', 'r') as file:
-    for line in file:
-        if 'Iteration 5000,' in line:
-            sonuclar.append(line.strip())
+    with open('sonuclar92.txt', 'r') as file:
+        for line in file:
+            if 'Iteration 5000,' in line:
+                sonuclar.append(line.strip())
 
-for sonuc in sonuclar:
-    print(sonuc)
+    for sonuc in sonuclar:
+        print(sonuc)
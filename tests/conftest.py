@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The package lives in the repository root; no install step is needed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,85 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import numpy as np
+
+from pyharmonyoptimizer import (Categorical, Checkpoint, Continuous, Discrete, EvaluationArchive, Minimization,
+                                decode_history, read_history)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def design():
+    return {'x': Continuous(-2, 2), 'n': Discrete([1, 2, 4, 8]), 'c': Categorical(['a', 'b', None])}
+
+
+def objective(harmony):
+    return harmony['x'] ** 2 + harmony['n'] + (harmony['c'] is None), 0.0
+
+
+# Dies without unwinding after `crash_at` evaluations, like a killed process
+CRASHING_RUN = textwrap.dedent('''
+    import os, sys
+    sys.path.insert(0, sys.argv[1])
+    from tests.test_archive import design, objective
+    from pyharmonyoptimizer import Checkpoint, EvaluationArchive, Minimization
+
+    calls = 0
+
+    def crashing(harmony):
+        global calls
+        calls += 1
+        if calls > int(sys.argv[4]):
+            os._exit(1)
+        return objective(harmony)
+
+    optimizer = Minimization(design(), crashing, seed=3, history=EvaluationArchive(sys.argv[2], chunk=64))
+    optimizer.optimize(memory_size=10, max_iter=1000, checkpoint=Checkpoint(sys.argv[3], every=100))
+''')
+
+
+def uninterrupted(path):
+    optimizer = Minimization(design(), objective, seed=3, history=EvaluationArchive(path, chunk=64))
+    optimizer.optimize(memory_size=10, max_iter=1000)
+    optimizer.history.close()
+    return read_history(path)
+
+
+def test_records_and_meta(tmp_path):
+    path = str(tmp_path / 'history.bin')
+    with EvaluationArchive(path, chunk=16) as archive:
+        optimizer = Minimization(design(), objective, seed=0, history=archive)
+        optimizer.optimize(memory_size=5, max_iter=100, batch_size=3)
+    records, meta = read_history(path)
+    assert len(records) == optimizer.evaluations == meta['count']
+    np.testing.assert_array_equal(records['evaluation'], np.arange(len(records)))
+    assert meta['runs'] == 1 and (records['run'] == 0).all()
+    values = decode_history(records, meta)
+    assert set(values['c']) <= {'a', 'b', None}
+    np.testing.assert_array_equal(records['fitness'],
+                                  values['x'] ** 2 + values['n'] + [c is None for c in values['c']])
+
+    with EvaluationArchive(path) as archive:
+        Minimization(design(), objective, seed=1, history=archive).optimize(memory_size=5, max_iter=20)
+    records, meta = read_history(path)
+    assert meta['runs'] == 2 and len(records) == optimizer.evaluations + 25
+    np.testing.assert_array_equal(records['evaluation'][-25:], np.arange(25))
+
+
+def test_resume_after_a_crash_continues_the_archived_run(tmp_path):
+    path, checkpoint = str(tmp_path / 'history.bin'), str(tmp_path / 'run.npz')
+    crashed = subprocess.run([sys.executable, '-c', CRASHING_RUN, ROOT, path, checkpoint, '700'])
+    assert crashed.returncode == 1
+    records, meta = read_history(path)
+    # Records up to the last checkpoint survived the crash
+    assert len(records) >= 600 and (records['run'] == 0).all()
+
+    with EvaluationArchive(path, chunk=64) as archive:
+        resumed = Minimization(design(), objective, seed=3, history=archive)
+        resumed.optimize(memory_size=10, max_iter=1000, resume_from=checkpoint)
+    records, meta = read_history(path)
+    expected, _ = uninterrupted(str(tmp_path / 'expected.bin'))
+    assert meta['runs'] == 1 and meta['count'] == resumed.evaluations
+    np.testing.assert_array_equal(records, expected)
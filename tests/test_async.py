@@ -0,0 +1,109 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from pyharmonyoptimizer import Continuous, EvaluationCache, MaxEvaluations, Minimization
+from pyharmonyoptimizer.async_optimizer import AsyncMinimization
+
+DESIGN = {'x': Continuous(-5, 5), 'y': Continuous(-5, 5)}
+
+
+def sphere(harmony):
+    return (harmony['x'] - 1) ** 2 + (harmony['y'] + 2) ** 2, 0.0
+
+
+class FakeServer:
+
+    # Local TCP stand-in for a simulation server: one JSON harmony per
+    # line in, one [fitness, penalty] line out after `latency` seconds
+    def __init__(self, latency=0.005):
+        self.latency = latency
+        self.requests = 0
+        self.active = 0
+        self.peak = 0
+
+    async def handle(self, reader, writer):
+        while line := await reader.readline():
+            self.requests += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            await asyncio.sleep(self.latency)
+            self.active -= 1
+            writer.write((json.dumps(sphere(json.loads(line))) + '\n').encode())
+            await writer.drain()
+        writer.close()
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def objective(self, harmony):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        writer.write((json.dumps(harmony.copy()) + '\n').encode())
+        fitness, penalty = json.loads(await reader.readline())
+        writer.close()
+        await writer.wait_closed()
+        return fitness, penalty
+
+
+def optimize(concurrency, seed=0, max_iter=150, **options):
+    async def run():
+        async with FakeServer() as server:
+            optimizer = AsyncMinimization(DESIGN, server.objective, concurrency=concurrency, seed=seed,
+                                          cache=options.pop('cache', None))
+            await optimizer.optimize_async(memory_size=10, max_iter=max_iter, **options)
+            return optimizer, server
+
+    return asyncio.run(run())
+
+
+def test_concurrency_one_matches_minimization():
+    optimizer, server = optimize(1, seed=4)
+    reference = Minimization(DESIGN, sphere, seed=4)
+    reference.optimize(memory_size=10, max_iter=150)
+    assert optimizer.best_fit == reference.best_fit
+    np.testing.assert_array_equal(optimizer.convergence, reference.convergence)
+    assert server.peak == 1
+    assert server.requests == optimizer.evaluations == 160
+
+
+@pytest.mark.parametrize('concurrency', [4, 16])
+def test_requests_overlap_up_to_the_limit(concurrency):
+    optimizer, server = optimize(concurrency)
+    assert 1 < server.peak <= concurrency
+    assert server.requests == optimizer.evaluations == 160
+    assert len(optimizer.convergence) == 150
+    assert np.all(np.diff(optimizer.convergence) <= 0)
+
+
+def test_stopping_cancels_pending_evaluations():
+    optimizer, server = optimize(8, max_iter=10000, stop=MaxEvaluations(60))
+    assert optimizer.stop_reason == 'MaxEvaluations'
+    assert len(optimizer.convergence) < 10000
+    # At most the other in-flight evaluations started after the limit
+    assert 60 <= optimizer.evaluations < 60 + 8
+    assert server.requests <= optimizer.evaluations
+
+
+def test_cache_hits_skip_the_server():
+    optimizer, server = optimize(4, cache=EvaluationCache(tolerance=0.5))
+    assert optimizer.cache.hits > 0
+    assert server.requests == optimizer.evaluations < 160
+
+
+def test_blocking_entry_point():
+    async def objective(harmony):
+        await asyncio.sleep(0)
+        return sphere(harmony)
+
+    optimizer = AsyncMinimization(DESIGN, objective, concurrency=1, seed=2)
+    out, best_fit = optimizer.optimize(memory_size=10, max_iter=100)
+    reference = Minimization(DESIGN, sphere, seed=2)
+    assert best_fit == reference.optimize(memory_size=10, max_iter=100)[1]
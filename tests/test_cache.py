@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from pyharmonyoptimizer import Continuous, Discrete, EvaluationCache, Minimization
+
+
+def keys(count):
+    return [bytes([index]) for index in range(count)]
+
+
+def test_lru_evicts_the_least_recently_used_entry():
+    cache = EvaluationCache(maxsize=3, policy='lru')
+    a, b, c, d = keys(4)
+    for key in (a, b, c):
+        cache.put(key, (1.0, 0.0))
+    assert cache.get(a) == (1.0, 0.0)
+    cache.put(d, (2.0, 0.0))
+    assert cache.get(b) is None
+    assert all(cache.get(key) is not None for key in (a, c, d))
+
+
+def test_fifo_evicts_the_oldest_entry_even_if_used():
+    cache = EvaluationCache(maxsize=3, policy='fifo')
+    a, b, c, d = keys(4)
+    for key in (a, b, c):
+        cache.put(key, (1.0, 0.0))
+    cache.get(a)
+    cache.put(d, (2.0, 0.0))
+    assert cache.get(a) is None
+    assert len(cache) == 3
+
+
+def test_stats_count_hits_and_misses():
+    cache = EvaluationCache(maxsize=10)
+    a, b = keys(2)
+    cache.put(a, (1.0, 0.0))
+    cache.get(a)
+    cache.get(a)
+    cache.get(b)
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'size': 1, 'hit_rate': 2 / 3}
+    cache.clear()
+    assert cache.stats() == {'hits': 0, 'misses': 0, 'size': 0, 'hit_rate': 0.0}
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        EvaluationCache(policy='random')
+
+
+def test_tolerance_groups_nearby_continuous_values():
+    cache = EvaluationCache(tolerance=0.1)
+    continuous = np.array([True, False])
+    assert cache.key(np.array([1.01, 2.0]), continuous) == cache.key(np.array([0.99, 2.0]), continuous)
+    assert cache.key(np.array([1.01, 2.0]), continuous) != cache.key(np.array([1.01, 3.0]), continuous)
+    assert cache.key(np.array([1.01, 2.0]), continuous) != cache.key(np.array([1.31, 2.0]), continuous)
+
+
+def test_cached_run_matches_uncached_run_with_fewer_evaluations():
+    design = {'n': Discrete(list(range(6))), 'x': Continuous(0, 1)}
+    calls = []
+
+    def objective(harmony):
+        calls.append(1)
+        return (harmony['n'] - 2) ** 2 + harmony['x'], 0.0
+
+    plain = Minimization(design, objective, seed=3)
+    plain.optimize(memory_size=5, max_iter=300)
+    uncached_calls = len(calls)
+    calls.clear()
+    cached = Minimization(design, objective, seed=3, cache=EvaluationCache(tolerance=None))
+    cached.optimize(memory_size=5, max_iter=300)
+    assert cached.best_fit == plain.best_fit
+    np.testing.assert_array_equal(cached.convergence, plain.convergence)
+    assert len(calls) == cached.evaluations == cached.cache.misses
+    assert cached.evaluations + cached.cache.hits == uncached_calls
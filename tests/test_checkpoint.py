@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from pyharmonyoptimizer import (
+    Checkpoint, Continuous, Discrete, GlobalBestHarmonySearch, HarmonySearch, ImprovedHarmonySearch,
+    MaxEvaluations, Minimization, SelfAdaptiveHarmonySearch, StoppingCriterion, load_checkpoint,
+)
+
+DESIGN = {'x0': Continuous(-5, 5), 'x1': Continuous(-5, 5), 'n': Discrete(list(range(-3, 4)))}
+PITCHES = [HarmonySearch, ImprovedHarmonySearch, GlobalBestHarmonySearch, SelfAdaptiveHarmonySearch]
+
+
+def sphere(harmony):
+    return harmony['x0'] ** 2 + harmony['x1'] ** 2 + harmony['n'] ** 2, 0.0
+
+
+class Crash(Exception):
+    pass
+
+
+class CrashAfter:
+
+    # Objective that dies after a number of evaluations, like a killed run
+    def __init__(self, evaluations):
+        self.left = evaluations
+
+    def __call__(self, harmony):
+        self.left -= 1
+        if self.left < 0:
+            raise Crash()
+        return sphere(harmony)
+
+
+class StopAt(StoppingCriterion):
+
+    def __init__(self, iteration):
+        self.iteration = iteration
+
+    def __call__(self, optimizer, iteration):
+        return iteration >= self.iteration
+
+
+def uninterrupted(pitch, batch_size, seed=11, max_iter=600):
+    optimizer = Minimization(DESIGN, sphere, seed=seed)
+    optimizer.optimize(memory_size=10, max_iter=max_iter, batch_size=batch_size, pitch=pitch())
+    return optimizer
+
+
+@pytest.mark.parametrize('batch_size', [1, 7])
+@pytest.mark.parametrize('pitch', PITCHES)
+def test_resume_after_crash_matches_uninterrupted_run(tmp_path, pitch, batch_size):
+    path = str(tmp_path / 'run.npz')
+    checkpoint = Checkpoint(path, every=100)
+    crashed = Minimization(DESIGN, CrashAfter(450), seed=11)
+    with pytest.raises(Crash):
+        crashed.optimize(memory_size=10, max_iter=600, batch_size=batch_size, pitch=pitch(),
+                         checkpoint=checkpoint)
+    checkpoint.wait()
+    assert int(load_checkpoint(path)['iteration']) > 0
+
+    resumed = Minimization(DESIGN, sphere, seed=99)
+    resumed.optimize(memory_size=10, max_iter=600, batch_size=batch_size, pitch=pitch(), resume_from=path)
+    expected = uninterrupted(pitch, batch_size)
+    np.testing.assert_array_equal(resumed.convergence, expected.convergence)
+    np.testing.assert_array_equal(resumed.harmony_memory, expected.harmony_memory)
+    np.testing.assert_array_equal(resumed.fitness_memory, expected.fitness_memory)
+    assert resumed.evaluations == expected.evaluations
+
+
+def test_resume_at_300_reproduces_the_trace(tmp_path):
+    path = str(tmp_path / 'run.npz')
+    first = Minimization(DESIGN, sphere, seed=5)
+    first.optimize(memory_size=10, max_iter=600, checkpoint=Checkpoint(path, every=100), stop=StopAt(300))
+    state = load_checkpoint(path)
+    assert int(state['iteration']) == 300
+    assert len(state['convergence']) == 300
+
+    resumed = Minimization(DESIGN, sphere, seed=5)
+    resumed.optimize(memory_size=10, max_iter=600, resume_from=path)
+    expected = uninterrupted(HarmonySearch, 1, seed=5)
+    np.testing.assert_array_equal(resumed.convergence[:300], first.convergence)
+    np.testing.assert_array_equal(resumed.convergence, expected.convergence)
+    assert resumed.best_fit == expected.best_fit
+
+
+def test_max_evaluations_continues_after_resume(tmp_path):
+    path = str(tmp_path / 'run.npz')
+    first = Minimization(DESIGN, sphere, seed=5)
+    first.optimize(memory_size=10, max_iter=1000, checkpoint=Checkpoint(path, every=100), stop=StopAt(310))
+    assert first.evaluations == 320
+
+    resumed = Minimization(DESIGN, sphere, seed=5)
+    resumed.optimize(memory_size=10, max_iter=1000, resume_from=path, stop=MaxEvaluations(400))
+    assert resumed.stop_reason == 'MaxEvaluations'
+    assert resumed.evaluations == 400
+    assert len(resumed.convergence) == 390
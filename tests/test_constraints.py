@@ -0,0 +1,136 @@
+import numpy as np
+import pytest
+
+from pyharmonyoptimizer import (Constraint, Continuous, EvaluationArchive, EvaluationCache, KNNSurrogate,
+                                Minimization, read_history)
+
+TAU_MAX, SIGMA_MAX, DELTA_MAX, P, L, E, G = 13600, 30000, 0.25, 6000, 14, 30e6, 12e6
+
+WELDED_BEAM = {'x1': Continuous(0.1, 2), 'x2': Continuous(0.1, 10), 'x3': Continuous(0.1, 10),
+               'x4': Continuous(0.1, 2)}
+
+
+def cost(h):
+    return 1.10471 * h['x1'] ** 2 * h['x2'] + 0.04811 * h['x3'] * h['x4'] * (14 + h['x2'])
+
+
+def shear(h):
+    x1, x2, x3 = h['x1'], h['x2'], h['x3']
+    m = P * (L + x2 / 2)
+    r = (x2 ** 2 / 4 + ((x1 + x3) / 2) ** 2) ** 0.5
+    j = 2 * (x1 * x2 * 2 ** 0.5 * (x2 ** 2 / 12 + ((x1 + x3) / 2) ** 2))
+    t1, t2 = P / (x1 * x2 * 2 ** 0.5), m * r / j
+    return (t1 ** 2 + t2 ** 2 + 2 * x2 * t1 * t2 / (2 * r)) ** 0.5 - TAU_MAX
+
+
+def buckling(h):
+    x3, x4 = h['x3'], h['x4']
+    pc = 4.013 * E * (x3 ** 2 * x4 ** 6 / 36) ** 0.5 / L ** 2 * (1 - x3 / (2 * L) * (E / (4 * G)) ** 0.5)
+    return P - pc
+
+
+CONSTRAINTS = [
+    Constraint(shear, cost=5),
+    Constraint(lambda h: 6 * P * L / (h['x4'] * h['x3'] ** 2) - SIGMA_MAX, cost=2, name='bending'),
+    Constraint(lambda h: h['x1'] - h['x4'], name='geometry'),
+    Constraint(lambda h: 0.10471 * h['x1'] ** 2 + 0.04811 * h['x3'] * h['x4'] * (14 + h['x2']) - 5, name='budget'),
+    Constraint(lambda h: 0.125 - h['x1'], name='x1'),
+    Constraint(lambda h: 4 * P * L ** 3 / (E * h['x3'] ** 3 * h['x4']) - DELTA_MAX, cost=2, name='deflection'),
+    Constraint(buckling, cost=3),
+]
+
+
+def hand_summed(h):
+    # Violations added in the order the optimizer checks them
+    ordered = sorted(CONSTRAINTS, key=lambda constraint: constraint.cost)
+    return cost(h), sum(max(constraint.func(h), 0.0) for constraint in ordered)
+
+
+def counting(calls, result=0.0, name=None):
+    def constraint(h):
+        calls.append(name)
+        return result(h) if callable(result) else result
+    return constraint
+
+
+def test_constraints_run_cheapest_first_and_before_the_objective():
+    calls = []
+    constraints = [Constraint(counting(calls, name='dear'), cost=3), Constraint(counting(calls, name='cheap'), cost=1),
+                   Constraint(counting(calls, name='mid'), cost=2)]
+    optimizer = Minimization({'x': Continuous(0, 1)}, lambda h: (calls.append('objective') or 0.0, 0.0),
+                             constraints=constraints, seed=0)
+    assert [constraint.cost for constraint in optimizer.constraints] == [1, 2, 3]
+    optimizer.evaluate(np.array([0.5]))
+    assert calls == ['cheap', 'mid', 'dear', 'objective']
+
+
+def test_rejection_bound():
+    optimizer = Minimization({'x': Continuous(0, 1)}, lambda h: (h['x'], 0.0), seed=0)
+    optimizer.worst_index = None
+    assert optimizer.rejection_bound() == np.inf
+    harmonies = np.array([[0.1], [0.2], [0.3]])
+    # Feasible worst: any violation rules a harmony out
+    optimizer.set_harmony_memory(harmonies, [1.0, 2.0, 3.0], [0.0, 0.0, 0.0])
+    assert optimizer.rejection_bound() == 0.0
+    # Infeasible worst: its penalty
+    optimizer.set_harmony_memory(harmonies, [1.0, 2.0, 3.0], [0.0, 2.5, 1.0])
+    assert optimizer.rejection_bound() == 2.5
+
+
+@pytest.mark.parametrize('bound, checked', [(0.0, ['cheap']), (2.5, ['cheap', 'dear']), (np.inf, ['cheap', 'dear'])])
+def test_later_constraints_are_skipped_once_the_bound_is_reached(bound, checked):
+    calls = []
+    constraints = [Constraint(counting(calls, 1.0, 'cheap'), cost=1), Constraint(counting(calls, 2.0, 'dear'), cost=2)]
+    optimizer = Minimization({'x': Continuous(0, 1)}, lambda h: (0.0, 0.0), constraints=constraints, seed=0)
+    penalty, rejected = optimizer.constraint_penalty(np.array([[0.5]]), bound)
+    assert calls == checked
+    assert penalty[0] == (1.0 if bound == 0 else 3.0)
+    assert rejected[0] == (bound != np.inf)
+
+
+def test_skipped_counts_the_objective_calls_avoided():
+    calls = []
+
+    def objective(h):
+        calls.append(h['x'])
+        return h['x'], 0.0
+
+    constraint = Constraint(lambda h: h['x'] - 0.3, name='below')
+    optimizer = Minimization({'x': Continuous(0, 1)}, objective, constraints=[constraint], seed=0)
+    optimizer.optimize(memory_size=5, max_iter=400, batch_size=4)
+    assert optimizer.skipped > 0
+    assert len(calls) == optimizer.evaluations
+    assert optimizer.evaluations + optimizer.skipped == 405
+    assert (optimizer.penalty_memory == 0).all()
+
+
+@pytest.mark.parametrize('batch_size', [1, 8])
+def test_partial_results_never_reach_cache_surrogate_or_archive(tmp_path, batch_size):
+    path = str(tmp_path / 'history.bin')
+    with EvaluationArchive(path) as archive:
+        optimizer = Minimization(WELDED_BEAM, lambda h: (cost(h), 0.0), constraints=CONSTRAINTS, seed=0,
+                                 cache=EvaluationCache(tolerance=0.05), surrogate=KNNSurrogate(warmup=20),
+                                 history=archive)
+        optimizer.optimize(memory_size=10, max_iter=1500, batch_size=batch_size)
+    assert optimizer.skipped > 0
+    assert all(np.isfinite(fitness) for fitness, _ in optimizer.cache.entries.values())
+    surrogate = optimizer.surrogate
+    assert surrogate.count == optimizer.evaluations
+    assert np.isfinite(surrogate._fitness[:surrogate.count]).all()
+    records, meta = read_history(path)
+    assert len(records) == optimizer.evaluations
+    assert np.isfinite(records['fitness']).all()
+
+
+@pytest.mark.parametrize('seed', range(3))
+@pytest.mark.parametrize('batch_size', [1, 10])
+def test_welded_beam_matches_the_hand_summed_objective(seed, batch_size):
+    summed = Minimization(WELDED_BEAM, hand_summed, seed=seed)
+    summed.optimize(max_iter=3000, batch_size=batch_size)
+    declared = Minimization(WELDED_BEAM, lambda h: (cost(h), 0.0), constraints=CONSTRAINTS, seed=seed)
+    declared.optimize(max_iter=3000, batch_size=batch_size)
+    np.testing.assert_array_equal(declared.convergence, summed.convergence)
+    np.testing.assert_array_equal(declared.harmony_memory, summed.harmony_memory)
+    assert declared.best_fit == summed.best_fit
+    assert declared.evaluations + declared.skipped == summed.evaluations
+    assert declared.evaluations < summed.evaluations
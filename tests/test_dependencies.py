@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from pyharmonyoptimizer import (
+    Continuous, Discrete, GlobalBestHarmonySearch, HarmonySearch, ImprovedHarmonySearch, Minimization,
+    SelfAdaptiveHarmonySearch,
+)
+
+PITCHES = [HarmonySearch, ImprovedHarmonySearch, GlobalBestHarmonySearch, SelfAdaptiveHarmonySearch]
+
+
+def design():
+    # low <= x <= high, d <= x and y >= low
+    return {'low': Continuous(0, 5),
+            'high': Continuous(5, 10),
+            'x': Continuous(0, 10, dependencies={'min_val': 'low', 'max_val': 'high'}),
+            'd': Discrete(list(range(11)), dependencies={'max_val': 'x'}),
+            'y': Discrete([0, 2, 4, 6, 8, 10], dependencies={'min_val': 'low'})}
+
+
+def objective(harmony):
+    return (harmony['x'] - 3) ** 2 + harmony['d'] + harmony['y'], 0.0
+
+
+def assert_within_bounds(optimizer, harmonies):
+    for harmony in harmonies:
+        values = optimizer.decode(harmony)
+        assert values['low'] <= values['x'] <= values['high']
+        assert values['d'] <= values['x']
+        assert values['y'] >= values['low']
+
+
+@pytest.mark.parametrize('batch_size', [1, 5])
+@pytest.mark.parametrize('pitch', PITCHES)
+def test_dependent_values_stay_within_their_bounds(pitch, batch_size):
+    seen = []
+
+    def recorded(harmony):
+        seen.append(dict(harmony))
+        return objective(harmony)
+
+    optimizer = Minimization(design(), recorded, seed=4)
+    optimizer.optimize(memory_size=8, hmcr=0.9, par=0.5, max_iter=500, batch_size=batch_size, pitch=pitch())
+    assert_within_bounds(optimizer, optimizer.harmony_memory)
+    assert len(seen) == optimizer.evaluations
+    for values in seen:
+        assert values['low'] <= values['x'] <= values['high']
+        assert values['d'] <= values['x']
+        assert values['y'] >= values['low']
+
+
+def test_improvised_harmonies_respect_bounds():
+    optimizer = Minimization(design(), objective, seed=9)
+    optimizer.initialize_harmony_memory(6)
+    assert_within_bounds(optimizer, optimizer.harmony_memory)
+    for _ in range(200):
+        assert_within_bounds(optimizer, [optimizer.generate_new_harmony(0.7, 0.6)])
+    assert_within_bounds(optimizer, optimizer.generate_new_harmonies(0.7, 0.6, 200))
+
+
+def test_dependency_must_be_declared_first():
+    with pytest.raises(ValueError, match="must be declared before it"):
+        Minimization({'x': Continuous(0, 1, dependencies={'max_val': 'y'}), 'y': Continuous(0, 1)}, objective)
+    with pytest.raises(ValueError, match="must be declared before it"):
+        Minimization({'x': Continuous(0, 1, dependencies={'max_val': 'x'})}, objective)
+
+
+@pytest.mark.parametrize('batch_size', [1, 6])
+def test_bandwidth_moves_of_dependent_values_are_kept(batch_size):
+    # SGHS moves every considered value; a moved dependent value within
+    # its bounds must not be swapped for a memory value
+    design = {'a': Continuous(5, 10), 'b': Continuous(0, 10, dependencies={'max_val': 'a'})}
+    optimizer = Minimization(design, lambda harmony: (harmony['b'], 0.0), seed=2)
+    optimizer.initialize_harmony_memory(5)
+    optimizer.pitch = SelfAdaptiveHarmonySearch(bw_max=0.05)
+    optimizer.pitch.start(optimizer, 1.0, 0.0, 100)
+    memory = optimizer.harmony_memory[:, 1]
+    for _ in range(50):
+        if batch_size == 1:
+            harmonies = [optimizer.generate_new_harmony(1.0, 0.0)]
+        else:
+            harmonies = optimizer.generate_new_harmonies(1.0, 0.0, batch_size)
+        for harmony in harmonies:
+            assert harmony[1] not in memory
+            assert np.abs(memory - harmony[1]).min() <= 0.05 * 10
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from pyharmonyoptimizer import Continuous, MaxEvaluations, Minimization
+from pyharmonyoptimizer.parallel import IslandMinimization, _neighbours
+
+DESIGN = {f'x{i}': Continuous(-5.12, 5.12) for i in range(5)}
+
+
+# Objectives are module level so the island processes can unpickle them
+def rastrigin(harmony):
+    x = np.array([harmony[var] for var in DESIGN])
+    return 10 * len(x) + float((x ** 2 - 10 * np.cos(2 * np.pi * x)).sum()), 0.0
+
+
+def failing(harmony):
+    raise ZeroDivisionError("island objective failed")
+
+
+def run(seed, islands=3, topology='ring', max_iter=600, stop=None):
+    optimizer = IslandMinimization(DESIGN, rastrigin, islands=islands, topology=topology,
+                                   migration_interval=100, migrants=2, seed=seed)
+    optimizer.optimize(memory_size=10, max_iter=max_iter, stop=stop)
+    return optimizer
+
+
+def test_neighbours():
+    assert [_neighbours('ring', island, 4) for island in range(4)] == [[1], [2], [3], [0]]
+    assert _neighbours('full', 1, 3) == [0, 2]
+
+
+@pytest.mark.parametrize('topology', ['ring', 'full'])
+def test_seeded_run_is_reproducible(topology):
+    first, second = run(7, topology=topology), run(7, topology=topology)
+    assert first.best_fit == second.best_fit
+    np.testing.assert_array_equal(first.convergence, second.convergence)
+    np.testing.assert_array_equal(first.harmony_memory, second.harmony_memory)
+    assert run(8, topology=topology).best_fit != first.best_fit
+
+
+def test_merged_memory_holds_the_best_of_every_island():
+    optimizer = run(1)
+    assert len(optimizer.results) == 3
+    assert [result.island for result in optimizer.results] == [0, 1, 2]
+    assert len(optimizer.harmony_memory) == 10
+    best = min(result.fitness_memory.min() for result in optimizer.results)
+    assert optimizer.best_fit == best
+    assert optimizer.evaluations == sum(result.evaluations for result in optimizer.results) == 3 * 610
+    assert len(optimizer.convergence) == 600
+    assert np.all(np.diff(optimizer.convergence) <= 0)
+
+
+def test_migration_spreads_good_harmonies():
+    optimizer = run(3, islands=4, topology='full')
+    assert sum(result.immigrants for result in optimizer.results) > 0
+    # Every island's memory was at least as good as the migrants it got
+    assert all(result.fitness_memory.min() >= optimizer.best_fit for result in optimizer.results)
+
+
+def test_a_stopping_criterion_stops_every_island():
+    # 10 initial evaluations, so each island meets it after 240 improvisations
+    optimizer = run(5, max_iter=5000, stop=MaxEvaluations(250))
+    assert optimizer.stop_reason == 'MaxEvaluations'
+    assert [len(result.convergence) for result in optimizer.results] == [240, 240, 240]
+    again = run(5, max_iter=5000, stop=MaxEvaluations(250))
+    np.testing.assert_array_equal(optimizer.convergence, again.convergence)
+
+
+def test_single_island_matches_minimization():
+    # One island migrates to itself, which never changes its memory
+    optimizer = run(11, islands=1)
+    seed = int(np.random.SeedSequence(11).generate_state(1)[0])
+    reference = Minimization(DESIGN, rastrigin, seed=seed)
+    reference.optimize(memory_size=10, max_iter=600)
+    assert optimizer.best_fit == reference.best_fit
+
+
+def test_island_errors_are_raised_in_the_parent():
+    optimizer = IslandMinimization(DESIGN, failing, islands=2, seed=0)
+    with pytest.raises(RuntimeError, match='ZeroDivisionError'):
+        optimizer.optimize(memory_size=5, max_iter=100)
@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from pyharmonyoptimizer import Continuous
+from pyharmonyoptimizer.multiobjective import (MultiObjectiveMinimization, ParetoArchive, crowding_distance,
+                                               dominance_matrix, fast_non_dominated_sort, select)
+
+
+def dominates(a, b):
+    return bool(np.all(a <= b) and np.any(a < b))
+
+
+def brute_fronts(objectives):
+    remaining = set(range(len(objectives)))
+    fronts = []
+    while remaining:
+        front = {i for i in remaining if not any(dominates(objectives[j], objectives[i]) for j in remaining)}
+        fronts.append(sorted(front))
+        remaining -= front
+    return fronts
+
+
+def points(seed, count=200, m=3):
+    # Integer grid values, so ties and duplicates occur
+    return np.random.default_rng(seed).integers(0, 8, size=(count, m)).astype(float)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_dominance_matrix_matches_brute_force(seed):
+    a, b = points(seed, 120), points(seed + 10, 90)
+    expected = np.array([[dominates(x, y) for y in b] for x in a])
+    np.testing.assert_array_equal(dominance_matrix(a, b, chunk=16), expected)
+    weak = np.array([[bool(np.all(x <= y)) for y in b] for x in a])
+    np.testing.assert_array_equal(dominance_matrix(a, b, weak=True, chunk=7), weak)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_fronts_match_brute_force(seed):
+    objectives = points(seed)
+    assert [sorted(front.tolist()) for front in fast_non_dominated_sort(objectives)] == brute_fronts(objectives)
+
+
+def test_crowding_distance_keeps_the_extremes():
+    objectives = np.array([[0.0, 4.0], [1.0, 2.0], [2.0, 1.5], [4.0, 0.0]])
+    distance = crowding_distance(objectives)
+    assert np.isinf(distance[[0, 3]]).all()
+    np.testing.assert_allclose(distance[1:3], [2 / 4 + 2.5 / 4, 3 / 4 + 2 / 4])
+
+
+def test_select_puts_feasible_fronts_before_infeasible_rows():
+    objectives = np.array([[1.0, 1.0], [0.0, 2.0], [2.0, 2.0], [0.0, 0.0], [5.0, 5.0]])
+    penalty = np.array([0.0, 0.0, 0.0, 3.0, 1.0])
+    chosen, ranks = select(objectives, penalty, 4)
+    assert chosen.tolist() == [0, 1, 2, 4]
+    assert ranks.tolist() == [0, 0, 1, 2]
+
+
+@pytest.mark.parametrize('chunk', [1024, 17])
+def test_archive_holds_the_non_dominated_set(chunk):
+    objectives = points(4, 600, 2)
+    archive = ParetoArchive()
+    for start in range(0, len(objectives), 50):
+        archive.add(np.arange(start, start + 50)[:, np.newaxis].astype(float), objectives[start:start + 50],
+                    chunk=chunk)
+    front = {tuple(point) for point in objectives[brute_fronts(objectives)[0]]}
+    assert {tuple(point) for point in archive.objectives} == front
+    assert len(archive) == len(front)
+    # Each kept harmony is the one that produced its objective vector
+    np.testing.assert_array_equal(objectives[archive.harmonies[:, 0].astype(int)], archive.objectives)
+
+
+def test_capacity_drops_the_most_crowded_points():
+    x = np.linspace(0, 1, 40)
+    objectives = np.column_stack([x, 1 - x])
+    archive = ParetoArchive(capacity=10)
+    archive.add(x[:, np.newaxis], objectives)
+    assert len(archive) == 10
+    assert {0.0, 1.0} <= set(archive.objectives[:, 0].tolist())
+
+
+def zdt1(harmony):
+    x = np.array([harmony[f'x{i}'] for i in range(10)])
+    g = 1 + 9 * x[1:].mean()
+    return np.array([x[0], g * (1 - np.sqrt(x[0] / g))]), 0.0
+
+
+def test_zdt1_front_approaches_the_true_front():
+    design = {f'x{i}': Continuous(0, 1) for i in range(10)}
+    optimizer = MultiObjectiveMinimization(design, zdt1, seed=0)
+    _, (harmonies, objectives) = optimizer.optimize(memory_size=50, max_iter=20000, batch_size=50)
+    assert len(harmonies) == len(objectives) > 100
+    gap = objectives[:, 1] - (1 - np.sqrt(objectives[:, 0]))
+    assert np.median(gap) < 0.005
+    assert not dominance_matrix(objectives).any()
+
+
+def test_convergence_log_records_archive_size_without_printing(tmp_path, capsys):
+    from pyharmonyoptimizer import ConvergenceLog, read_convergence_log
+
+    def objective(harmony):
+        return np.array([harmony['x'], 1 - harmony['x'] + harmony['y']]), 0.0
+
+    path = str(tmp_path / 'log.csv')
+    optimizer = MultiObjectiveMinimization({'x': Continuous(0, 1), 'y': Continuous(0, 1)}, objective, seed=0)
+    out, _ = optimizer.optimize(memory_size=10, max_iter=200, batch_size=4, log=ConvergenceLog(path))
+    assert out == "" and capsys.readouterr().out == ""
+    records = read_convergence_log(path)
+    np.testing.assert_array_equal(records['iteration'], np.arange(4, 201, 4))
+    np.testing.assert_array_equal(records['best_fit'], optimizer.convergence[3::4])
+    assert (records['best_penalty'] == 0).all()
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from pyharmonyoptimizer.PyHarmonyOptimizer import MemoryRanking
+
+
+def brute_key(fitness, penalty, index):
+    # Feasibility-first: feasible rows by fitness, then infeasible by penalty
+    if penalty[index] > 0:
+        return 1, penalty[index]
+    return 0, fitness[index]
+
+
+def brute_best(fitness, penalty):
+    return min(range(len(fitness)), key=lambda index: (brute_key(fitness, penalty, index), index))
+
+
+def brute_worst(fitness, penalty):
+    return max(range(len(fitness)), key=lambda index: (brute_key(fitness, penalty, index), index))
+
+
+@pytest.mark.parametrize('seed', range(300))
+def test_best_and_worst_match_a_brute_force_scan(seed):
+    rng = np.random.default_rng(seed)
+    size = int(rng.integers(1, 12))
+    # Few distinct values, so ties in fitness and penalty are common
+    fitness = rng.integers(-3, 4, size).astype(float)
+    penalty = np.where(rng.random(size) < 0.4, rng.integers(1, 4, size), 0).astype(float)
+    ranking = MemoryRanking(fitness, penalty)
+    for _ in range(60):
+        assert ranking.best() == brute_best(fitness, penalty)
+        assert ranking.worst() == brute_worst(fitness, penalty)
+        index = int(rng.integers(size))
+        fitness[index] = rng.integers(-3, 4)
+        penalty[index] = rng.integers(1, 4) if rng.random() < 0.4 else rng.choice([0.0, -1.0])
+        ranking.update(index)
+
+
+def test_best_and_worst_differ_when_all_keys_tie():
+    ranking = MemoryRanking(np.zeros(5), np.zeros(5))
+    assert (ranking.best(), ranking.worst()) == (0, 4)
+
+
+def test_heaps_are_rebuilt_after_many_updates():
+    fitness, penalty = np.arange(4.0), np.zeros(4)
+    ranking = MemoryRanking(fitness, penalty)
+    for step in range(1000):
+        fitness[step % 4] = -step
+        ranking.update(step % 4)
+        assert len(ranking._best) <= 2 * 4 + 17
+    assert ranking.best() == 999 % 4
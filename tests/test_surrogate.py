@@ -0,0 +1,39 @@
+import numpy as np
+
+from pyharmonyoptimizer import Categorical, Continuous, KNNSurrogate, Minimization
+
+
+def sphere(harmony):
+    return sum(harmony[var] ** 2 for var in harmony if var != 'c'), 0.0
+
+
+def test_rebinding_starts_a_fresh_model():
+    surrogate = KNNSurrogate(warmup=20, capacity=100)
+    first = Minimization({'x': Continuous(-1, 1), 'y': Continuous(-1, 1)}, sphere, seed=0, surrogate=surrogate)
+    first.optimize(memory_size=10, max_iter=300, batch_size=10)
+    assert surrogate.count == 100 and surrogate.screened > 0
+
+    design = {'x': Continuous(-1, 1), 'c': Categorical(['a', 'b', 'c'])}
+    second = Minimization(design, sphere, seed=0, surrogate=surrogate)
+    assert (surrogate.count, surrogate.position, surrogate.screened, surrogate.passed) == (0, 0, 0, 0)
+    second.optimize(memory_size=10, max_iter=300, batch_size=10)
+    plain = Minimization(design, sphere, seed=0, surrogate=KNNSurrogate(warmup=20, capacity=100))
+    plain.optimize(memory_size=10, max_iter=300, batch_size=10)
+    np.testing.assert_array_equal(second.convergence, plain.convergence)
+    assert second.surrogate.stats() == plain.surrogate.stats()
+
+
+def test_prediction_matches_brute_force():
+    surrogate = KNNSurrogate(k=3, warmup=1, capacity=50)
+    optimizer = Minimization({'x': Continuous(0, 2), 'y': Continuous(0, 4)}, sphere, seed=1, surrogate=surrogate)
+    optimizer.initialize_harmony_memory(40)
+    rng = np.random.default_rng(0)
+    queries = np.column_stack([rng.uniform(0, 2, 10), rng.uniform(0, 4, 10)])
+    fitness, penalty = surrogate.predict(queries)
+    scaled = optimizer.harmony_memory / [2, 4]
+    for query, expected in zip(queries / [2, 4], fitness):
+        distances = np.sqrt(((scaled - query) ** 2).sum(axis=1))
+        nearest = np.argsort(distances)[:3]
+        weights = 1 / (distances[nearest] + 1e-12)
+        assert np.isclose(expected, (weights * optimizer.fitness_memory[nearest]).sum() / weights.sum())
+    assert (penalty == 0).all()
@@ -0,0 +1,35 @@
+import numpy as np
+
+from pyharmonyoptimizer import Continuous, Discrete, Minimization, UniqueMemory
+
+
+def optimizer(calls):
+    design = {'x': Discrete(list(range(20))), 'y': Continuous(0, 1)}
+
+    def objective(harmony):
+        calls.append(dict(harmony))
+        return harmony['x'] + harmony['y'], 0.0
+
+    optimizer = Minimization(design, objective, seed=0, unique=UniqueMemory())
+    optimizer.initialize_harmony_memory(5)
+    return optimizer
+
+
+def test_memory_rows_are_rejected_before_evaluation():
+    calls = []
+    opt = optimizer(calls)
+    assert not opt.update_harmony_memory(opt.harmony_memory[2].copy())
+    assert opt.update_harmony_memory_batch(opt.harmony_memory[:3].copy()) == 0
+    assert len(calls) == 5
+    assert opt.unique.rejected == 4
+
+
+def test_copies_within_a_batch_are_stored_once_and_not_counted():
+    calls = []
+    opt = optimizer(calls)
+    best = np.array([0.0, 0.0])
+    assert opt.update_harmony_memory_batch(np.array([best, best, best])) == 1
+    assert len(calls) == 8
+    assert opt.unique.rejected == 0
+    assert (opt.harmony_memory == best).all(axis=1).sum() == 1
+    assert opt.diversity() == 1.0
@@ -0,0 +1,27 @@
+from pyharmonyoptimizer import Categorical, Continuous, Discrete, HarmonyView, Minimization
+
+
+def test_views_of_the_initial_memory_do_not_change():
+    design = {'x': Continuous(0, 1), 'n': Discrete([1, 2, 3]), 'c': Categorical(['a', 'b'])}
+    views = []
+
+    def objective(harmony):
+        assert isinstance(harmony, HarmonyView)
+        views.append((harmony, harmony.copy()))
+        return harmony['x'] + harmony['n'], 0.0
+
+    optimizer = Minimization(design, objective, seed=1)
+    optimizer.optimize(memory_size=6, max_iter=300)
+    assert len(views) == optimizer.evaluations
+    for view, values in views:
+        assert dict(view) == values
+
+
+def test_view_reads_and_copies():
+    design = {'x': Continuous(0, 1), 'c': Categorical(['a', 'b'])}
+    optimizer = Minimization(design, lambda harmony: (0.0, 0.0), seed=1)
+    optimizer.initialize_harmony_memory(3)
+    view = HarmonyView(optimizer.space, optimizer.harmony_memory[0])
+    assert list(view) == ['x', 'c'] and len(view) == 2 and 'c' in view and 'y' not in view
+    assert view['c'] in ('a', 'b')
+    assert view.copy() == optimizer.decode(optimizer.harmony_memory[0])